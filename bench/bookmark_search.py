@@ -0,0 +1,242 @@
+"""
+书签搜索引擎对比基准
+
+在不同书签规模下比较两种搜索引擎:
+- memory: 以 mmap 方式打开紧凑书签文件并查找（默认引擎）
+- fts: 查询 SQLite FTS5 trigram 全文索引，只返回当前页和匹配总数
+
+并以“解析书签文件后逐条过滤”作为参考实现，校验两种引擎的匹配总数以及第一页、中间页的结果是否一致
+（包括 in: 限定文件夹的查询、文件夹结果，以及去重后书签在其他出现位置的文件夹中的匹配）。
+另外用一个小的书签文件校验: URL 规范化后相同、标题不同的书签合并为一条，每个标题都能搜到。
+
+用法:
+    python bench/bookmark_search.py [--sizes 10000,100000,1000000]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+import fixtures
+
+sys.path.insert(0, fixtures.PROJECT_ROOT)
+from tools import chrome_bookmark  # noqa: E402
+
+# 重复书签（URL 规范化后相同）的比例
+DUPLICATE_RATE = 0.1
+KEYWORDS = [
+    'github', 'python docs', '数据库', 'py', '书', 'zzzz', '',
+    'in:其他书签', 'in:书签栏 github', 'in:"书签栏" 书', 'in:Redis py', 'in:书签栏/Docker', 'in:不存在 py'
+]
+
+
+def write_bookmarks(home, count):
+    """
+    生成指定数量的书签文件（不缩进，减小大规模下的文件体积）
+
+    参数:
+        home: HOME 目录路径
+        count: 书签数量
+
+    返回:
+        书签文件路径
+    """
+    profile = os.path.join(home, fixtures.CHROME_PROFILE)
+    os.makedirs(profile, exist_ok=True)
+    path = os.path.join(profile, 'Bookmarks')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(fixtures.make_bookmarks(count, duplicate_rate=DUPLICATE_RATE), f, ensure_ascii=False)
+    return path
+
+
+def in_scope(path, spec, strict=False):
+    """
+    参考实现：判断路径是否位于匹配限定条件的文件夹中
+
+    参数:
+        path: 书签或文件夹的路径
+        spec: 规范化后的文件夹限定条件
+        strict: 为 True 时不包括路径自身（文件夹只搜索匹配文件夹的后代）
+
+    返回:
+        是否在范围内
+    """
+    parts = path.lower().split('/')
+    for depth in range(1, len(parts) + (0 if strict else 1)):
+        if ('/' + '/'.join(parts[:depth])).endswith('/' + spec):
+            return True
+    return False
+
+
+def reference_search(links, folders, search_keyword):
+    """
+    参考实现：逐条过滤文件夹和书签
+
+    参数:
+        links: _flatten_bookmarks 返回的链接列表
+        folders: _flatten_bookmarks 返回的文件夹列表
+        search_keyword: 搜索关键词（可以包含 in: 文件夹限定）
+
+    返回:
+        匹配的文件夹和书签（文件夹在前）
+    """
+    from utils import BookmarkUtils
+
+    folder_spec, keyword = chrome_bookmark._parse_query(search_keyword)
+    spec = BookmarkUtils.normalize_folder_spec(folder_spec) if folder_spec is not None else ''
+    keyword = keyword.lower()
+    matched_folders = [{
+        'type': 'folder',
+        'title': folder['title'],
+        'path': folder['path'],
+        'count': folder['count']
+    } for folder in folders[1:]
+        if keyword and keyword in folder['title'].lower() and (not spec or in_scope(folder['path'], spec, True))]
+    matched_links = [{
+        'id': link['id'],
+        'title': link['title'],
+        'url': link['url'],
+        'paths': link['paths']
+    } for link in links
+        if (any(keyword in title.lower() for title in link['titles']) or keyword in link['url'].lower())
+        and (not spec or any(in_scope(path, spec) for path in link['paths']))]
+    return matched_folders + matched_links
+
+
+def check_duplicate_titles(workdir):
+    """
+    校验标题不同的重复书签: 合并为一条，按任一标题（包括限定文件夹）都能搜到
+
+    参数:
+        workdir: 工作目录
+
+    返回:
+        是否两种引擎的结果都符合预期
+    """
+    def folder(name, children):
+        return {'type': 'folder', 'name': name, 'children': children}
+
+    def url(name, address, bookmark_id):
+        return {'type': 'url', 'name': name, 'url': address, 'id': bookmark_id}
+
+    home = os.path.join(workdir, 'home-duplicate-titles')
+    profile = os.path.join(home, fixtures.CHROME_PROFILE)
+    os.makedirs(profile, exist_ok=True)
+    path = os.path.join(profile, 'Bookmarks')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'roots': {
+            'bookmark_bar': folder('书签栏', [
+                folder('Python', [url('Python Docs', 'https://docs.python.org/3/', '1')])
+            ]),
+            'other': folder('其他书签', [
+                folder('Work', [url('Reference Manual', 'http://docs.python.org/3', '2')])
+            ])
+        }}, f, ensure_ascii=False)
+    os.environ['HOME'] = home
+
+    expected = (1, [{
+        'id': '1',
+        'title': 'Python Docs',
+        'url': 'https://docs.python.org/3/',
+        'paths': ['书签栏/Python', '其他书签/Work']
+    }])
+    print('\n标题不同的重复书签')
+    passed = True
+    for keyword in ['manual', 'in:Work manual', 'python docs', 'in:Python reference']:
+        with chrome_bookmark._load_compact_bookmarks(path) as bookmarks:
+            folder_spec, text = chrome_bookmark._parse_query(keyword)
+            scope = bookmarks.scope(folder_spec) if folder_spec is not None else None
+            matches = bookmarks.search(text, scope)
+            memory = (len(matches), bookmarks.links(matches))
+        page = chrome_bookmark._search_fts(path, keyword, 0)
+        same = memory == expected and (page['total'], page['links']) == expected
+        passed &= same
+        print(f"{keyword:<22}{'OK' if same else 'FAIL'}")
+    return passed
+
+
+def timed(func, *args):
+    begin = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - begin) * 1000
+
+
+def run(count, workdir):
+    """
+    在指定规模下运行一轮对比
+
+    参数:
+        count: 书签数量
+        workdir: 工作目录（索引写入其中的 cache/）
+
+    返回:
+        是否所有关键词的结果都一致
+    """
+    home = os.path.join(workdir, f'home-{count}')
+    path = write_bookmarks(home, count)
+    os.environ['HOME'] = home
+    size_mb = os.path.getsize(path) / 1024 / 1024
+
+    tree, load_ms = timed(chrome_bookmark._load_bookmarks, path)
+    links, folders, duplicates = chrome_bookmark._flatten_bookmarks(tree)
+    del tree
+    _, compact_ms = timed(lambda: chrome_bookmark._load_compact_bookmarks(path).close())
+    compact_mb = os.path.getsize(chrome_bookmark.COMPACT_FILE) / 1024 / 1024
+    _, build_ms = timed(chrome_bookmark._search_fts, path, '', 0)
+    index_mb = os.path.getsize(chrome_bookmark.FTS_INDEX_DB) / 1024 / 1024
+    print(f'\n{count} 个书签（去重后 {len(links)} 个）  文件 {size_mb:.1f}MB  解析 {load_ms:.0f}ms  '
+          f'紧凑文件构建 {compact_ms:.0f}ms（{compact_mb:.1f}MB）  FTS 建索引 {build_ms:.0f}ms（{index_mb:.1f}MB）')
+    print(f"{'关键词':<18}{'匹配数':>10}{'参考(ms)':>12}{'memory(ms)':>12}{'fts(ms)':>10}  一致")
+
+    passed = True
+    for keyword in KEYWORDS:
+        def memory_search(offset):
+            folder_spec, text = chrome_bookmark._parse_query(keyword)
+            with chrome_bookmark._load_compact_bookmarks(path) as bookmarks:
+                scope = bookmarks.scope(folder_spec) if folder_spec is not None else None
+                folder_matches = bookmarks.search_folders(text, scope)
+                link_matches = bookmarks.search(text, scope)
+                page = chrome_bookmark._build_page(
+                    len(folder_matches),
+                    lambda start, limit: bookmarks.folders(folder_matches[start:start + limit]),
+                    len(link_matches),
+                    lambda start, limit: bookmarks.links(link_matches[start:start + limit]),
+                    offset
+                )
+                return page['total'], page['links']
+
+        expected, reference_ms = timed(reference_search, links, folders, keyword)
+        middle = len(expected) // 2
+        pages = [
+            (len(expected), expected[:chrome_bookmark.MAX_RESULTS]),
+            (len(expected), expected[middle:middle + chrome_bookmark.MAX_RESULTS])
+        ]
+        (total, first), memory_ms = timed(memory_search, 0)
+        page, fts_ms = timed(chrome_bookmark._search_fts, path, keyword, 0)
+        middle_page = chrome_bookmark._search_fts(path, keyword, middle)
+        same = (
+            [(total, first), memory_search(middle)] == pages
+            and [(page['total'], page['links']), (middle_page['total'], middle_page['links'])] == pages
+        )
+        passed &= same
+        print(f"{keyword or '(空)':<18}{len(expected):>10}{load_ms + reference_ms:>12.1f}{memory_ms:>12.1f}"
+              f"{fts_ms:>10.1f}  {'OK' if same else 'FAIL'}")
+    return passed
+
+
+if __name__ == '__main__':
+    sizes = [10000, 100000, 1000000]
+    argv = sys.argv[1:]
+    while argv:
+        arg = argv.pop(0)
+        if arg == '--sizes':
+            sizes = [int(size) for size in argv.pop(0).split(',')]
+
+    passed = True
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        passed &= check_duplicate_titles(tmp)
+        for count in sizes:
+            passed &= run(count, tmp)
+    sys.exit(0 if passed else 1)
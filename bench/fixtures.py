@@ -0,0 +1,280 @@
+"""
+基准测试夹具
+
+生成模拟的 Chrome Bookmarks / Favicons / History 文件，并将 workflow 部署到临时目录，
+使基准脚本可以在 Linux 上脱离真实的 Chrome 环境运行。
+
+书签工具通过 ~/Library/Application Support/Google/Chrome/Default 定位文件，
+运行子进程时将 HOME 指向 make_home() 生成的目录即可。
+"""
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHROME_PROFILE = os.path.join('Library', 'Application Support', 'Google', 'Chrome', 'Default')
+
+# 部署时需要复制的文件与目录
+DEPLOY_ITEMS = ['main.py', 'workflow.py', 'utils', 'tools', 'logo']
+
+WORDS = [
+    'python', 'github', 'docs', 'alfred', 'workflow', 'chrome', 'linux', 'kernel',
+    'rust', 'golang', 'java', 'spring', 'redis', 'mysql', 'kafka', 'docker',
+    'kubernetes', 'nginx', 'grafana', 'prometheus', 'blog', 'news', 'wiki', 'api',
+    '书签', '文档', '教程', '工具', '监控', '部署', '数据库', '性能'
+]
+DOMAINS = [
+    'github.com', 'docs.python.org', 'stackoverflow.com', 'developer.mozilla.org',
+    'www.alfredapp.com', 'kubernetes.io', 'redis.io', 'dev.mysql.com', 'juejin.cn',
+    'zhuanlan.zhihu.com', 'news.ycombinator.com', 'en.wikipedia.org'
+]
+# 1x1 像素 PNG
+PNG_PIXEL = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c63000100000500010d0a2db40000000049454e44ae426082'
+)
+CHROME_EPOCH_OFFSET = 11644473600000000
+
+
+def _chrome_now():
+    return str(CHROME_EPOCH_OFFSET + 1700000000000000)
+
+
+def make_bookmarks(count, seed=0, fanout=20, duplicate_rate=0.0):
+    """
+    生成 Chrome Bookmarks 格式的书签文档
+
+    参数:
+        count: 书签数量
+        seed: 随机种子（可选）
+        fanout: 每个文件夹最多包含的书签数（可选）
+        duplicate_rate: 重复书签的比例（可选），重复书签的 URL 与之前的某个书签只差协议、末尾的 /、
+                        utm_* 参数或锚点
+
+    返回:
+        书签 JSON 对象
+    """
+    rng = random.Random(seed)
+    next_id = [1]
+
+    def new_id():
+        next_id[0] += 1
+        return str(next_id[0])
+
+    urls = []
+
+    def url_node():
+        words = rng.sample(WORDS, 3)
+        domain = rng.choice(DOMAINS)
+        url = f"https://{domain}/{'/'.join(words)}?id={next_id[0] + 1}"
+        if duplicate_rate and urls and rng.random() < duplicate_rate:
+            url = rng.choice(urls).replace('https://', rng.choice(['https://', 'http://']))
+            url += rng.choice(['', '&utm_source=feed', '#section'])
+        else:
+            urls.append(url)
+        return {
+            'date_added': _chrome_now(),
+            'date_last_used': '0',
+            'guid': '%032x' % rng.getrandbits(128),
+            'id': new_id(),
+            'meta_info': {'power_bookmark_meta': 'x' * 32},
+            'name': ' '.join(words).title(),
+            'type': 'url',
+            'url': url
+        }
+
+    def folder_node(name, size, depth):
+        children = []
+        remaining = size
+        while remaining > 0:
+            if depth < 3 and remaining > fanout and rng.random() < 0.3:
+                sub = min(remaining, rng.randint(fanout, fanout * 4))
+                children.append(folder_node(rng.choice(WORDS).title(), sub, depth + 1))
+                remaining -= sub
+            else:
+                children.append(url_node())
+                remaining -= 1
+        return {
+            'children': children,
+            'date_added': _chrome_now(),
+            'date_modified': _chrome_now(),
+            'guid': '%032x' % rng.getrandbits(128),
+            'id': new_id(),
+            'name': name,
+            'type': 'folder'
+        }
+
+    bar = count * 3 // 4
+    return {
+        'checksum': '0' * 32,
+        'roots': {
+            'bookmark_bar': folder_node('书签栏', bar, 0),
+            'other': folder_node('其他书签', count - bar, 0),
+            'synced': folder_node('移动设备书签', 0, 0)
+        },
+        'sync_metadata': 'A' * 4096,
+        'version': 1
+    }
+
+
+def make_favicons(db_path, bookmarks):
+    """
+    生成 Chrome Favicons 数据库，为每个书签域名写入一个图标
+
+    参数:
+        db_path: 数据库文件路径
+        bookmarks: make_bookmarks() 生成的书签 JSON 对象
+    """
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE favicon_bitmaps (id INTEGER PRIMARY KEY, icon_id INTEGER, width INTEGER, image_data BLOB);
+        CREATE TABLE icon_mapping (id INTEGER PRIMARY KEY, page_url TEXT, icon_id INTEGER);
+        CREATE INDEX icon_mapping_page_url_idx ON icon_mapping(page_url);
+    """)
+    for icon_id, domain in enumerate(DOMAINS, 1):
+        conn.execute('INSERT INTO favicon_bitmaps (icon_id, width, image_data) VALUES (?, ?, ?)',
+                     (icon_id, 16, PNG_PIXEL))
+        conn.execute('INSERT INTO icon_mapping (page_url, icon_id) VALUES (?, ?)',
+                     (f'https://{domain}/', icon_id))
+    conn.commit()
+    conn.close()
+
+
+def make_history(db_path, count, seed=0):
+    """
+    生成 Chrome History 数据库（只包含 urls 表中用到的字段）
+
+    参数:
+        db_path: 数据库文件路径
+        count: 历史记录数量
+        seed: 随机种子（可选）
+    """
+    rng = random.Random(seed)
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE urls (id INTEGER PRIMARY KEY AUTOINCREMENT, url LONGVARCHAR, title LONGVARCHAR,
+                           visit_count INTEGER DEFAULT 0 NOT NULL, typed_count INTEGER DEFAULT 0 NOT NULL,
+                           last_visit_time INTEGER NOT NULL, hidden INTEGER DEFAULT 0 NOT NULL)
+    """)
+    now = CHROME_EPOCH_OFFSET + 1700000000000000
+    rows = []
+    for i in range(count):
+        words = rng.sample(WORDS, 3)
+        rows.append((
+            f"https://{rng.choice(DOMAINS)}/{'/'.join(words)}?h={i}",
+            ' '.join(words).title(),
+            rng.randint(1, 50),
+            now - rng.randint(0, 90 * 86400) * 1000000,
+            1 if rng.random() < 0.01 else 0
+        ))
+    conn.executemany('INSERT INTO urls (url, title, visit_count, last_visit_time, hidden) VALUES (?, ?, ?, ?, ?)', rows)
+    conn.commit()
+    conn.close()
+
+
+def make_home(root, count=2000, seed=0):
+    """
+    生成包含 Chrome 书签和图标数据库的模拟 HOME 目录
+
+    参数:
+        root: HOME 目录路径
+        count: 书签数量（可选）
+        seed: 随机种子（可选）
+
+    返回:
+        HOME 目录路径
+    """
+    profile = os.path.join(root, CHROME_PROFILE)
+    os.makedirs(profile, exist_ok=True)
+    bookmarks = make_bookmarks(count, seed)
+    with open(os.path.join(profile, 'Bookmarks'), 'w', encoding='utf-8') as f:
+        json.dump(bookmarks, f, ensure_ascii=False, indent=3)
+    make_favicons(os.path.join(profile, 'Favicons'), bookmarks)
+    make_history(os.path.join(profile, 'History'), count * 5, seed)
+    return root
+
+
+# 协程模块夹具: getData / parseData / ifNoData / onException 都是 async def，
+# 查询 empty 时 getData 返回 None，查询 error 时抛出异常
+ASYNC_TOOL = '''import asyncio
+
+
+async def getData(args, workflow):
+    query = args[0] if args else ''
+    await asyncio.sleep(0)
+    if query == 'error':
+        raise RuntimeError('bench async error')
+    return None if query == 'empty' else [query]
+
+
+async def parseData(workflow, data, args):
+    await asyncio.sleep(0)
+    workflow.add_item(title=f'async parseData: {data[0]}')
+
+
+async def ifNoData(workflow, args):
+    await asyncio.sleep(0)
+    workflow.add_item(title='async ifNoData')
+
+
+async def onException(args, workflow):
+    await asyncio.sleep(0)
+    workflow.add_item(title='async onException')
+'''
+ASYNC_TOOL_MODULE = 'tools.bench_async'
+# 协程模块夹具的查询 -> 期望出现的结果标题
+ASYNC_TOOL_CASES = {
+    'ok': 'async parseData: ok',
+    'empty': 'async ifNoData',
+    'error': 'async onException',
+}
+
+
+def install_async_tool(cwd):
+    """
+    在部署目录中安装协程模块夹具（tools/bench_async.py）
+
+    参数:
+        cwd: 部署目录
+
+    返回:
+        模块路径
+    """
+    with open(os.path.join(cwd, 'tools', 'bench_async.py'), 'w', encoding='utf-8') as f:
+        f.write(ASYNC_TOOL)
+    return ASYNC_TOOL_MODULE
+
+
+def deploy(dest, bundle=False):
+    """
+    将 workflow 源码部署到目标目录（不包含 __pycache__ 和图标缓存），模拟一次全新部署
+
+    参数:
+        dest: 目标目录
+        bundle: 是否部署 build.py 生成的预编译产物（可选）
+
+    返回:
+        目标目录路径
+    """
+    if bundle:
+        sys.path.insert(0, PROJECT_ROOT)
+        import build
+        return build.build(dest)
+    if os.path.exists(dest):
+        shutil.rmtree(dest)
+    os.makedirs(dest)
+    ignore = shutil.ignore_patterns('__pycache__', '*.pyc', 'favicons')
+    for name in DEPLOY_ITEMS:
+        src = os.path.join(PROJECT_ROOT, name)
+        if os.path.isdir(src):
+            shutil.copytree(src, os.path.join(dest, name), ignore=ignore)
+        else:
+            shutil.copy2(src, os.path.join(dest, name))
+    return dest
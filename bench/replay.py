@@ -0,0 +1,188 @@
+"""
+Script Filter 端到端按键回放压测
+
+模拟 Alfred 的调用方式：用户每敲一个键就启动一个独立的
+`python main.py tools.<x> <query>` 进程，前一个进程未结束时后一个已经启动。
+统计每个进程的首字节耗时（TTFB）和完整 JSON 输出耗时，并校验输出可被解析。
+
+每一轮都在全新的部署目录（无 __pycache__、无 cache/、无图标缓存）上回放一次:
+冷启动: 每轮的第一个进程（需要编译字节码、构建紧凑书签文件和数据库快照）
+热启动: 每轮的其余进程（即使与第一个进程重叠，也已经可以使用它生成的产物）
+
+用法:
+    python bench/replay.py [--module tools.chrome_bookmark] [--words github,python]
+                           [--sequence 文件] [--interval 0.08] [--bookmarks 2000]
+                           [--rounds 5] [--bundle]
+
+--rounds 为全新部署的次数，也就是冷启动的样本数。
+
+--sequence 文件每行为一条完整查询（# 开头为注释），回放时逐字符输入。
+--bundle 回放 build.py 生成的预编译产物。
+"""
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import fixtures
+
+sys.path.insert(0, fixtures.PROJECT_ROOT)
+from report import percentile  # noqa: E402
+
+DEFAULT_WORDS = ['github', 'python docs', '书签', 'kube', 'redis']
+
+
+def typing_sequence(queries):
+    """
+    将完整查询展开为逐键输入的前缀序列
+
+    参数:
+        queries: 完整查询列表
+
+    返回:
+        前缀列表，例如 ['g', 'gi', 'git']
+    """
+    prefixes = []
+    for query in queries:
+        prefixes.extend(query[:i] for i in range(1, len(query) + 1))
+    return prefixes
+
+
+def load_sequence(path):
+    """
+    读取录制的查询文件
+
+    参数:
+        path: 文件路径
+
+    返回:
+        查询列表
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.rstrip('\n') for line in f if line.strip() and not line.startswith('#')]
+
+
+def run_one(cwd, env, module, query, results, index):
+    """
+    启动一个 main.py 进程并记录耗时
+
+    参数:
+        cwd: 部署目录
+        env: 子进程环境变量
+        module: 模块路径
+        query: 查询参数
+        results: 结果列表，第 index 项写入 (ttfb, complete, ok)
+        index: 进程的启动顺序
+    """
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, 'main.py', module, query],
+        cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    first = proc.stdout.read(1)
+    ttfb = time.perf_counter() - start
+    rest = proc.stdout.read()
+    complete = time.perf_counter() - start
+    proc.wait()
+    try:
+        ok = isinstance(json.loads((first + rest).decode('utf-8')).get('items'), list)
+    except ValueError:
+        ok = False
+    results[index] = (ttfb * 1000, complete * 1000, ok)
+
+
+def replay(cwd, env, module, prefixes, interval, jitter=0.3, seed=0):
+    """
+    按真实键入节奏回放前缀序列，进程之间允许重叠
+
+    参数:
+        cwd: 部署目录
+        env: 子进程环境变量
+        module: 模块路径
+        prefixes: 前缀序列
+        interval: 平均按键间隔（秒）
+        jitter: 间隔抖动比例（可选）
+        seed: 随机种子（可选）
+
+    返回:
+        按启动顺序排列的 [(ttfb, complete, ok), ...]
+    """
+    rng = random.Random(seed)
+    results = [None] * len(prefixes)
+    threads = []
+    for index, prefix in enumerate(prefixes):
+        thread = threading.Thread(target=run_one, args=(cwd, env, module, prefix, results, index))
+        thread.start()
+        threads.append(thread)
+        time.sleep(max(interval * (1 + rng.uniform(-jitter, jitter)), 0))
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def summarize(label, results):
+    """
+    输出一组回放结果的统计信息
+
+    参数:
+        label: 标题
+        results: replay() 返回的结果
+    """
+    ttfb = sorted(r[0] for r in results)
+    complete = sorted(r[1] for r in results)
+    invalid = sum(1 for r in results if not r[2])
+    print(f'== {label} ==  进程数: {len(results)}  无效输出: {invalid}')
+    print(f"{'指标':<10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for name, values in (('ttfb', ttfb), ('complete', complete)):
+        print(f'{name:<10}'
+              f'{percentile(values, 50):>10.1f}'
+              f'{percentile(values, 95):>10.1f}'
+              f'{percentile(values, 99):>10.1f}'
+              f'{values[-1]:>10.1f}')
+
+
+if __name__ == '__main__':
+    module = 'tools.chrome_bookmark'
+    queries = DEFAULT_WORDS
+    interval = 0.08
+    bookmarks = 2000
+    rounds = 5
+    bundle = False
+    argv = sys.argv[1:]
+    while argv:
+        arg = argv.pop(0)
+        if arg == '--module':
+            module = argv.pop(0)
+        elif arg == '--words':
+            queries = argv.pop(0).split(',')
+        elif arg == '--sequence':
+            queries = load_sequence(argv.pop(0))
+        elif arg == '--interval':
+            interval = float(argv.pop(0))
+        elif arg == '--bookmarks':
+            bookmarks = int(argv.pop(0))
+        elif arg == '--rounds':
+            rounds = int(argv.pop(0))
+        elif arg == '--bundle':
+            bundle = True
+
+    prefixes = typing_sequence(queries)
+    with tempfile.TemporaryDirectory() as tmp:
+        home = fixtures.make_home(os.path.join(tmp, 'home'), bookmarks)
+        env = dict(os.environ, HOME=home)
+        env.pop('PYTHONDONTWRITEBYTECODE', None)
+
+        print(f'模块: {module}  书签数: {bookmarks}  按键数: {len(prefixes)}  按键间隔: {interval}s  部署次数: {rounds}')
+        cold = []
+        warm = []
+        for i in range(rounds):
+            cwd = fixtures.deploy(os.path.join(tmp, 'workflow'), bundle)
+            results = replay(cwd, env, module, prefixes, interval, seed=i)
+            cold.append(results[0])
+            warm.extend(results[1:])
+        summarize('冷启动', cold)
+        summarize('热启动', warm)
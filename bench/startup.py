@@ -0,0 +1,140 @@
+"""
+启动耗时预算检查
+
+在全新部署目录上以 `python -X importtime main.py <tool> <query>` 运行每个工具，
+统计冷启动（首次运行，需要编译字节码）与热启动的模块导入总耗时，
+超过预算时以非 0 状态码退出。同时检查不应在该查询路径上加载的模块。
+
+机器快慢和负载会让绝对耗时相差数十毫秒，预算按相对基线的倍数设置: 每次冷启动前在同一目录中
+测量一次基线（`python -X importtime -c "import json"`，解释器启动加 Alfred 输出必需的 json），
+冷启动耗时 / 基线耗时不超过预算倍数即通过。
+每个工具重复部署 --repeat 次，取倍数的最小值以减少机器负载带来的抖动。
+最后用协程模块夹具（fixtures.ASYNC_TOOL）端到端检查 async def 的
+getData / parseData / ifNoData / onException 都被执行。
+
+用法:
+    python bench/startup.py [--scale 1.5] [--bundle] [--repeat 3]
+
+--scale 用于按比例放宽预算倍数。
+--bundle 检查 build.py 生成的预编译产物。
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import fixtures
+
+# 工具 -> (查询参数, 冷启动导入耗时预算（基线的倍数）, 不应被导入的模块)
+# 预算在实测最小倍数（time 约 1.8、chrome_bookmark 约 2.7、chrome_history 约 2.3）之上留约 30% 余量
+BUDGETS = {
+    'tools.time': (['now'], 2.4, ['logging', 'traceback', 'asyncio', 'sqlite3', 'hashlib', 'pathlib']),
+    'tools.chrome_bookmark': (['zzzz'], 3.5, ['logging', 'traceback', 'asyncio', 'sqlite3', 'shutil', 'pathlib']),
+    'tools.chrome_history': (['zzzz'], 3.0, ['logging', 'traceback', 'asyncio']),
+}
+# 基线进程: 解释器启动加 json
+BASELINE = ['-c', 'import json']
+
+
+def measure(cwd, env, tool, args):
+    """
+    运行一次工具并解析 -X importtime 输出
+
+    参数:
+        cwd: 部署目录
+        env: 子进程环境变量
+        tool: 模块路径，为 None 时运行基线进程
+        args: 查询参数
+
+    返回:
+        (导入总耗时（微秒）, 已导入模块名集合)
+    """
+    command = BASELINE if tool is None else ['main.py', tool] + args
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime'] + command,
+        cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    total = 0
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        total += int(self_us)
+        modules.add(name.strip())
+    return total, modules
+
+
+def check_async(cwd, env):
+    """
+    端到端检查协程模块: 每个查询的输出都包含期望的结果项，且没有未执行的协程
+
+    参数:
+        cwd: 部署目录
+        env: 子进程环境变量
+
+    返回:
+        是否全部通过
+    """
+    tool = fixtures.install_async_tool(cwd)
+    passed = True
+    for query, expected in fixtures.ASYNC_TOOL_CASES.items():
+        proc = subprocess.run(
+            [sys.executable, 'main.py', tool, query],
+            cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        )
+        try:
+            titles = [item['title'] for item in json.loads(proc.stdout)['items']]
+        except (ValueError, KeyError, TypeError):
+            titles = []
+        ok = expected in titles and 'never awaited' not in proc.stderr
+        passed &= ok
+        print(f"{tool + ' ' + query:<24}{'OK' if ok else 'FAIL':>12}  {expected}")
+    return passed
+
+
+if __name__ == '__main__':
+    scale = 1.0
+    bundle = False
+    repeat = 3
+    argv = sys.argv[1:]
+    while argv:
+        arg = argv.pop(0)
+        if arg == '--scale':
+            scale = float(argv.pop(0))
+        elif arg == '--bundle':
+            bundle = True
+        elif arg == '--repeat':
+            repeat = int(argv.pop(0))
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        home = fixtures.make_home(os.path.join(tmp, 'home'), 200)
+        env = dict(os.environ, HOME=home)
+        env.pop('PYTHONDONTWRITEBYTECODE', None)
+        print(f"{'工具':<24}{'基线(ms)':>10}{'冷启动(ms)':>12}{'热启动(ms)':>12}{'倍数':>8}{'预算':>8}")
+        for tool, (args, budget, lazy_modules) in BUDGETS.items():
+            ratio = float('inf')
+            modules = set()
+            for _ in range(repeat):
+                cwd = fixtures.deploy(os.path.join(tmp, tool), bundle)
+                baseline_us, _ = measure(cwd, env, None, None)
+                cold_us, cold_modules = measure(cwd, env, tool, args)
+                warm_us, _ = measure(cwd, env, tool, args)
+                if cold_us / baseline_us < ratio:
+                    ratio = cold_us / baseline_us
+                    baseline, cold, warm = baseline_us, cold_us, warm_us
+                modules |= cold_modules
+            budget = budget * scale
+            status = 'OK' if ratio <= budget else 'FAIL'
+            print(f'{tool:<24}{baseline / 1000:>10.1f}{cold / 1000:>12.1f}{warm / 1000:>12.1f}'
+                  f'{ratio:>8.2f}{budget:>8.2f}  {status}')
+            loaded = sorted(set(lazy_modules) & modules)
+            if loaded:
+                print(f"  不应加载的模块: {', '.join(loaded)}")
+                status = 'FAIL'
+            failed = failed or status == 'FAIL'
+        if not check_async(fixtures.deploy(os.path.join(tmp, 'async'), bundle), env):
+            failed = True
+    sys.exit(1 if failed else 0)
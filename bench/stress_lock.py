@@ -0,0 +1,133 @@
+"""
+单飞重建压力测试
+
+同时启动大量进程争抢同一个过期产物，检查:
+- 每一代产物只被重建一次
+- 产物始终完整（不会被多个进程交错写坏）
+- 未抢到锁的进程使用上一代产物或等待重建完成
+- Favicons 快照在并发提取图标时只复制一次，且不残留临时文件
+
+用法:
+    python bench/stress_lock.py [--processes 32]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import fixtures
+
+sys.path.insert(0, fixtures.PROJECT_ROOT)
+from utils import LockUtils  # noqa: E402
+
+PAYLOAD_SIZE = 1024 * 1024
+
+
+def _rebuild_worker(barrier, workdir, generation, queue):
+    """
+    子进程: 对同一产物执行单飞重建，产物内容为 (代数, 进程号) 重复填充
+    """
+    target = os.path.join(workdir, 'artifact.bin')
+    builds_log = os.path.join(workdir, 'builds.log')
+
+    def is_fresh(path):
+        with open(path, 'rb') as f:
+            return f.read(8) == b'%08d' % generation
+
+    def build(tmp):
+        with open(builds_log, 'a') as f:
+            f.write(f'{generation} {os.getpid()}\n')
+        chunk = b'%08d%08d' % (generation, os.getpid())
+        with open(tmp, 'wb') as f:
+            for _ in range(PAYLOAD_SIZE // len(chunk)):
+                f.write(chunk)
+                # 放慢写入速度，扩大并发窗口
+                if f.tell() % (64 * 1024) == 0:
+                    time.sleep(0.01)
+
+    barrier.wait()
+    status = LockUtils.single_flight(target, is_fresh, build)
+    with open(target, 'rb') as f:
+        content = f.read()
+    chunk = content[:16]
+    intact = len(content) == PAYLOAD_SIZE // 16 * 16 and content == chunk * (len(content) // 16)
+    queue.put((status, intact))
+
+
+def _favicon_worker(barrier, workdir, home, queue):
+    """
+    子进程: 同时从 Favicons 快照中提取图标
+    """
+    os.chdir(workdir)
+    os.environ['HOME'] = home
+    from utils import ChromeUtils
+    barrier.wait()
+    icon = ChromeUtils.extract_local_icon('https://github.com/python')
+    queue.put(icon == fixtures.PNG_PIXEL)
+
+
+def run(target, args, processes):
+    """
+    同时启动多个进程并收集结果
+
+    参数:
+        target: 子进程函数
+        args: 子进程参数（不含 barrier 与 queue）
+        processes: 进程数
+
+    返回:
+        结果列表
+    """
+    ctx = multiprocessing.get_context('fork')
+    barrier = ctx.Barrier(processes)
+    queue = ctx.Queue()
+    workers = [ctx.Process(target=target, args=(barrier,) + args + (queue,)) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    results = [queue.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    return results
+
+
+def check(label, ok):
+    print(f"{'OK' if ok else 'FAIL':<6}{label}")
+    return ok
+
+
+if __name__ == '__main__':
+    processes = 32
+    argv = sys.argv[1:]
+    while argv:
+        arg = argv.pop(0)
+        if arg == '--processes':
+            processes = int(argv.pop(0))
+
+    passed = True
+    with tempfile.TemporaryDirectory() as tmp:
+        sys.path.insert(0, fixtures.PROJECT_ROOT)
+        for generation in (1, 2):
+            results = run(_rebuild_worker, (tmp, generation), processes)
+            with open(os.path.join(tmp, 'builds.log')) as f:
+                builds = [line for line in f if line.startswith(f'{generation} ')]
+            statuses = {}
+            for status, _ in results:
+                statuses[status] = statuses.get(status, 0) + 1
+            print(f'第 {generation} 代: {statuses}')
+            passed &= check(f'第 {generation} 代只重建一次 (实际 {len(builds)} 次)', len(builds) == 1)
+            passed &= check(f'第 {generation} 代产物完整', all(intact for _, intact in results))
+            passed &= check(f'第 {generation} 代所有进程都拿到了产物', 'missing' not in statuses)
+        leftovers = [f for f in os.listdir(tmp) if f.endswith('.tmp')]
+        passed &= check('没有残留临时文件', not leftovers)
+
+        home = fixtures.make_home(os.path.join(tmp, 'home'), 200)
+        workdir = os.path.join(tmp, 'workflow')
+        os.makedirs(workdir)
+        results = run(_favicon_worker, (workdir, home), processes)
+        passed &= check('并发提取图标全部成功', all(results))
+        cache_files = os.listdir(os.path.join(workdir, 'cache'))
+        passed &= check(f'Favicons 快照无残留临时文件 {cache_files}',
+                        not [f for f in cache_files if f.endswith('.tmp') or f.endswith('-wal')])
+
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,130 @@
+"""
+时间解析吞吐量基准
+
+对比 tools/time.py 的表驱动解析与改造前的实现（逐个正则 + time.strptime，原样保留在下方）:
+- 新实现（无缓存）: 每次都清空解析缓存
+- 新实现（有缓存）: 重复输入直接命中 lru_cache
+- 旧实现
+
+并校验两者都支持的输入结果一致。
+
+用法:
+    python bench/time_parse.py [--number 20000]
+"""
+import re
+import sys
+import time
+
+import fixtures
+
+sys.path.insert(0, fixtures.PROJECT_ROOT)
+from tools import time as time_tool  # noqa: E402
+
+# 两种实现都支持、且结果应当一致的输入
+COMMON_INPUTS = [
+    '2024-01-01',
+    '2024-01-01 12:00:00',
+    '1700000000',
+    '1700000000123',
+    '2024-02-30',
+    'abc',
+]
+# 只有新实现支持的输入
+EXTENDED_INPUTS = [
+    'now-1d',
+    '2024-01-01T12:00:00.123+08:00',
+    'Mon, 01 Jan 2024 12:00:00 +0800',
+    '13345000000000000',
+    '1700000000123456789',
+]
+
+
+def legacy_format_time(input_time):
+    """
+    改造前的 tools.time._format_time（原样保留，用于对比）
+    """
+    if not input_time:
+        return None
+
+    input_time = input_time.strip()
+
+    if input_time == 'now':
+        return time.time()
+
+    if re.match(r"^\d{4}-\d{2}-\d{2}$", input_time):
+        try:
+            return time.mktime(time.strptime(input_time, '%Y-%m-%d'))
+        except ValueError:
+            return None
+
+    if re.match(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$", input_time):
+        try:
+            return time.mktime(time.strptime(input_time, '%Y-%m-%d %H:%M:%S'))
+        except ValueError:
+            return None
+
+    if re.match(r"^\d+$", input_time):
+        try:
+            timestamp = int(input_time)
+            if timestamp > 253402185600:
+                timestamp = timestamp / 1000
+            return timestamp
+        except ValueError:
+            return None
+
+    return None
+
+
+def throughput(func, inputs, number, before=None):
+    """
+    测量每秒解析次数
+
+    参数:
+        func: 解析函数
+        inputs: 输入列表（循环使用）
+        number: 解析次数
+        before: 每次解析前调用的函数（可选），例如清空缓存
+
+    返回:
+        每秒解析次数
+    """
+    begin = time.perf_counter()
+    for i in range(number):
+        if before:
+            before()
+        func(inputs[i % len(inputs)])
+    return number / (time.perf_counter() - begin)
+
+
+if __name__ == '__main__':
+    number = 20000
+    argv = sys.argv[1:]
+    while argv:
+        arg = argv.pop(0)
+        if arg == '--number':
+            number = int(argv.pop(0))
+
+    passed = True
+    for text in COMMON_INPUTS:
+        expected = legacy_format_time(text)
+        actual = time_tool._format_time(text)
+        same = expected == actual
+        passed &= same
+        print(f"{'OK' if same else 'FAIL':<6}{text!r}: 旧 {expected!r} / 新 {actual!r}")
+    for text in EXTENDED_INPUTS:
+        actual = time_tool._format_time(text)
+        passed &= actual is not None
+        print(f"{'OK' if actual is not None else 'FAIL':<6}{text!r}: 新 {actual!r}")
+
+    print(f"\n{'实现':<20}{'次/秒':>14}")
+    results = [
+        ('旧实现', throughput(legacy_format_time, COMMON_INPUTS, number)),
+        ('新实现（无缓存）', throughput(time_tool._format_time, COMMON_INPUTS, number,
+                                 time_tool._parse_time.cache_clear)),
+        ('新实现（有缓存）', throughput(time_tool._format_time, COMMON_INPUTS, number)),
+        ('新实现扩展格式（无缓存）', throughput(time_tool._format_time, EXTENDED_INPUTS, number,
+                                     time_tool._parse_time.cache_clear)),
+    ]
+    for label, rate in results:
+        print(f"{label:<20}{rate:>14,.0f}")
+    sys.exit(0 if passed else 1)
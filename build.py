@@ -0,0 +1,104 @@
+"""
+构建预编译的 workflow 部署包
+
+将 main.py、workflow.py、utils、tools 编译为优化后的 .pyc（无源码，-OO 级别），
+logo 资源原样复制。部署后首次运行不需要再编译，也不依赖 __pycache__ 是否可写。
+
+构建产物结构:
+    main.py        启动器，仅导入预编译的 _main 模块
+    _main.pyc      由 main.py 编译
+    workflow.pyc
+    utils/*.pyc
+    tools/*.pyc
+    logo/
+
+注意: .pyc 与 Python 版本绑定，必须使用 Alfred 实际调用的 python3 执行构建。
+
+用法:
+    python build.py [输出目录]
+"""
+import os
+import py_compile
+import shutil
+import sys
+
+SRC = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(SRC, 'dist', 'workflow')
+# 需要编译的源码
+SOURCES = ['main.py', 'workflow.py', 'utils', 'tools']
+# 原样复制的资源
+ASSETS = ['logo']
+# 构建时忽略的运行期文件
+IGNORE = shutil.ignore_patterns('__pycache__', '*.pyc', 'favicons')
+
+LAUNCHER = '''import sys
+
+try:
+    from _main import main
+except ImportError as e:
+    import json
+    sys.stdout.write(json.dumps({"items": [{
+        "title": "Workflow 加载失败",
+        "subtitle": f"请使用 {sys.executable} 重新执行 build.py: {e}",
+        "valid": False
+    }]}))
+    sys.exit(1)
+
+main()
+'''
+
+
+def compile_file(src, dest):
+    """
+    将单个源文件编译为无源码的 .pyc
+
+    参数:
+        src: 源文件路径
+        dest: 目标 .pyc 路径
+    """
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    py_compile.compile(src, cfile=dest, dfile=os.path.relpath(src, SRC),
+                       doraise=True, optimize=2)
+
+
+def build(output=DEFAULT_OUTPUT):
+    """
+    构建部署包
+
+    参数:
+        output: 输出目录（可选），已存在时会被清空
+
+    返回:
+        输出目录路径
+    """
+    if os.path.exists(output):
+        shutil.rmtree(output)
+    os.makedirs(output)
+
+    for name in SOURCES:
+        src = os.path.join(SRC, name)
+        if os.path.isfile(src):
+            # main.py 编译为 _main.pyc，避免与启动器重名
+            target = '_main.pyc' if name == 'main.py' else name[:-3] + '.pyc'
+            compile_file(src, os.path.join(output, target))
+            continue
+        for root, dirs, files in os.walk(src):
+            dirs[:] = [d for d in dirs if d != '__pycache__']
+            for f in files:
+                if f.endswith('.py'):
+                    path = os.path.join(root, f)
+                    rel = os.path.relpath(path, SRC)
+                    compile_file(path, os.path.join(output, rel[:-3] + '.pyc'))
+
+    for name in ASSETS:
+        shutil.copytree(os.path.join(SRC, name), os.path.join(output, name), ignore=IGNORE)
+
+    with open(os.path.join(output, 'main.py'), 'w', encoding='utf-8') as f:
+        f.write(LAUNCHER)
+    return output
+
+
+if __name__ == '__main__':
+    output = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_OUTPUT
+    build(output)
+    print(f'构建完成 (Python {sys.version.split()[0]}): {output}')
@@ -1,7 +1,9 @@
 import sys
-import traceback
+import types
 from workflow import ChangXianWorkFlow
 from utils import CacheUtils
+from utils import CancelUtils
+from utils import MetricsUtils
 from utils.LogUtils import LogUtils
 
 
@@ -21,6 +23,9 @@ def init():
     # 解析模块路径，例如 "tools.time" -> 导入 tools.time 模块
     module_path = sys.argv[1]
     search_args = sys.argv[2:] if len(sys.argv) > 2 else []
+    MetricsUtils.begin(module_path, search_args)
+    # 更新模块的代数标记，同一模块仍在运行的旧请求会在检查点提前退出
+    CancelUtils.begin(module_path)
     
     # 动态导入模块
     # 例如 "tools.time" -> 导入 tools 包，然后获取 time 模块
@@ -32,10 +37,11 @@ def init():
     package_path = ".".join(path_parts[:-1])
     module_name = path_parts[-1]
     
-    # 导入包
-    package = __import__(package_path, fromlist=[module_name])
-    # 获取模块
-    module = getattr(package, module_name)
+    with MetricsUtils.phase('import'):
+        # 导入包
+        package = __import__(package_path, fromlist=[module_name])
+        # 获取模块
+        module = getattr(package, module_name)
     
     # 验证模块是否包含必需的方法
     if not hasattr(module, 'getData'):
@@ -43,6 +49,28 @@ def init():
     if not hasattr(module, 'parseData'):
         raise AttributeError(f"模块 {module_path} 缺少必需方法: parseData")
 
+def call_module(func, *args):
+    """
+    调用模块方法，支持普通函数和协程函数（async def）
+    
+    协程在 asyncio 事件循环中运行，模块内部可以通过 asyncio.to_thread
+    把阻塞的文件和 sqlite 读取放到线程池中并发执行。
+    asyncio 只在模块使用协程时才导入，普通模块不受影响
+    
+    参数:
+        func: 模块方法，例如 module.getData
+        args: 调用参数
+    
+    返回:
+        方法的返回值
+    """
+    result = func(*args)
+    if isinstance(result, types.CoroutineType):
+        import asyncio
+        result = asyncio.run(result)
+    return result
+
+
 def execute_module(workflow, module, args):
     """
     执行模块的业务逻辑
@@ -55,22 +83,91 @@ def execute_module(workflow, module, args):
     返回:
         data: 获取到的数据（用于日志记录）
     """
+    # 模块声明了 CACHE_POLICY 时尝试复用上一次的结果
+    if hasattr(module, 'CACHE_POLICY'):
+        return execute_module_cached(workflow, module, args, module.CACHE_POLICY)
+    
     # 1. 调用 getData 获取数据
-    data = module.getData(args, workflow)
+    with MetricsUtils.phase('getData'):
+        data = call_module(module.getData, args, workflow)
+    
+    # 2. 解析数据
+    parse_module_data(workflow, module, data, args)
+    return data
+
+
+def execute_module_cached(workflow, module, args, policy):
+    """
+    按模块声明的缓存策略执行模块，命中时不调用 getData
+    
+    缓存策略（模块级常量 CACHE_POLICY）:
+        ttl: 有效期（秒，可选），不设置表示只按源文件失效
+        key: 缓存键函数（可选），参数为 args，默认使用 args 本身
+        files: 源文件列表函数（可选），任一文件变化后缓存失效
+        level: 缓存层级（可选），data 缓存 getData 结果（默认），items 缓存最终的 Alfred 结果项
+    
+    参数:
+        workflow: ChangXianWorkFlow 实例
+        module: 动态加载的模块对象
+        args: 搜索参数列表
+        policy: 缓存策略字典
+    
+    返回:
+        data: 获取到的数据（用于日志记录）
+    """
+    from utils import MemoUtils
     
-    # 2. 如果有数据，调用 parseData 解析数据
+    level = policy.get('level', 'data')
+    key = (level, policy['key'](args) if 'key' in policy else tuple(args))
+    files = policy['files']() if 'files' in policy else []
+    
+    with MetricsUtils.phase('memo'):
+        hit, value = MemoUtils.load(module.__name__, key, files, policy.get('ttl'))
+    MetricsUtils.mark('cache', 'hit' if hit else 'miss')
+    
+    if hit and level == 'items':
+        workflow.items.extend(value)
+        return value
+    
+    if hit:
+        data = value
+    else:
+        with MetricsUtils.phase('getData'):
+            data = call_module(module.getData, args, workflow)
+        if data is not None and level == 'data':
+            MemoUtils.save(module.__name__, key, data, files)
+    
+    start = len(workflow.items)
+    parse_module_data(workflow, module, data, args)
+    if data is not None and level == 'items':
+        MemoUtils.save(module.__name__, key, workflow.items[start:], files)
+    return data
+
+
+def parse_module_data(workflow, module, data, args):
+    """
+    调用模块的 parseData 解析数据，数据为空时调用 ifNoData
+    
+    参数:
+        workflow: ChangXianWorkFlow 实例
+        module: 动态加载的模块对象
+        data: getData() 返回的数据
+        args: 搜索参数列表
+    """
+    # 如果有数据，调用 parseData 解析数据
     if data is not None:
-        module.parseData(workflow, data, args)
+        with MetricsUtils.phase('parseData'):
+            call_module(module.parseData, workflow, data, args)
     else:
         # 数据为空时的处理
+        MetricsUtils.mark('status', 'no_data')
         if hasattr(module, 'ifNoData'):
-            module.ifNoData(workflow, args)
+            call_module(module.ifNoData, workflow, args)
         else:
             workflow.add_error_item(
                 "查询结果为空",
                 "检查输入的参数修改后重试..."
             )
-    return data
 
 
 def handle_module_exception(workflow, module, args, exception):
@@ -86,7 +183,7 @@ def handle_module_exception(workflow, module, args, exception):
     # 调用模块的 onException 方法（如果存在）
     if hasattr(module, 'onException'):
         try:
-            module.onException(args, workflow)
+            call_module(module.onException, args, workflow)
         except Exception as e:
             LogUtils.error(f"模块 onException 方法执行失败: {str(e)}")
     
@@ -114,14 +211,23 @@ def entrance(workflow):
         
         # 执行模块逻辑
         data = execute_module(workflow, module, search_args)
+    except CancelUtils.Superseded:
+        # 已被同一模块更新的请求取代，Alfred 会丢弃本次输出，不再显示错误
+        workflow.items.clear()
+        MetricsUtils.mark('status', 'cancelled')
     except Exception as e:
-        # 捕获所有异常
+        # 捕获所有异常（traceback 只在异常时按需导入）
+        import traceback
         LogUtils.error(f"模块 {module.__name__} 执行异常: {' '.join(search_args)}")
         LogUtils.error(traceback.format_exc())
+        MetricsUtils.mark('status', 'error')
         handle_module_exception(workflow, module, search_args, e)
     finally:
         # 发送反馈给 Alfred
-        workflow.send_feedback()
+        with MetricsUtils.phase('feedback'):
+            workflow.send_feedback()
+        # 记录本次请求的结构化指标
+        MetricsUtils.finish(results=len(workflow.items))
         # 清理缓存
         CacheUtils.clean()
         # 记录日志
@@ -129,8 +235,10 @@ def entrance(workflow):
         LogUtils.info(f"请求: {' '.join(search_args)} | 响应: {data_str}")
 
 
-# 程序入口
-if __name__ == '__main__':
+def main():
+    """
+    程序入口（构建产物中由 main.py 启动器调用预编译的 _main 模块）
+    """
     try:
         init()
         changXianWorkFlow = ChangXianWorkFlow()
@@ -144,3 +252,8 @@ if __name__ == '__main__':
         )
         workflow.send_feedback()
         sys.exit(1)
+
+
+# 程序入口
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+请求耗时报告
+
+流式读取 alfred_metrics.jsonl，按模块、按阶段输出 p50/p95/p99 耗时，
+并按时间窗口输出耗时分布直方图，用于观察日常使用中的耗时回归。
+
+用法:
+    python report.py [指标文件] [--window 秒数] [--module 模块路径]
+"""
+import math
+import sys
+import time
+from utils import MetricsUtils
+
+# 直方图分桶上界（毫秒），最后一个桶为 >= 最大上界
+BUCKETS = [5, 10, 20, 50, 100, 200, 500, 1000]
+DEFAULT_WINDOW = 3600
+
+
+def percentile(values, p):
+    """
+    计算百分位数（nearest-rank）
+
+    参数:
+        values: 已排序的数值列表
+        p: 百分位（0-100）
+
+    返回:
+        百分位数值，列表为空返回 0
+    """
+    if not values:
+        return 0
+    rank = max(math.ceil(p / 100 * len(values)), 1)
+    return values[min(rank, len(values)) - 1]
+
+
+def bucket_index(value):
+    """
+    获取耗时所在的直方图分桶下标
+
+    参数:
+        value: 耗时（毫秒）
+
+    返回:
+        分桶下标
+    """
+    for i, upper in enumerate(BUCKETS):
+        if value < upper:
+            return i
+    return len(BUCKETS)
+
+
+def collect(records, window, module_filter=None):
+    """
+    汇总指标记录
+
+    参数:
+        records: 记录生成器
+        window: 时间窗口大小（秒）
+        module_filter: 只统计指定模块（可选）
+
+    返回:
+        (耗时字典, 直方图字典, 状态计数字典)
+        耗时字典: {(模块, 阶段): [耗时, ...]}，阶段 total 为整体耗时
+        直方图字典: {模块: {窗口起始时间: [各分桶计数]}}
+        状态计数字典: {模块: {状态: 次数}}
+    """
+    durations = {}
+    histograms = {}
+    statuses = {}
+    for record in records:
+        module = record.get('module', '')
+        if module_filter and module != module_filter:
+            continue
+        total = record.get('total', 0)
+        durations.setdefault((module, 'total'), []).append(total)
+        for name, value in record.get('phases', {}).items():
+            durations.setdefault((module, name), []).append(value)
+
+        window_start = int(record.get('ts', 0) // window * window)
+        counts = histograms.setdefault(module, {}).setdefault(
+            window_start, [0] * (len(BUCKETS) + 1))
+        counts[bucket_index(total)] += 1
+
+        status = record.get('status', 'ok')
+        cache = record.get('cache')
+        module_statuses = statuses.setdefault(module, {})
+        module_statuses[status] = module_statuses.get(status, 0) + 1
+        if cache:
+            key = f'cache_{cache}'
+            module_statuses[key] = module_statuses.get(key, 0) + 1
+    return durations, histograms, statuses
+
+
+def print_report(durations, histograms, statuses):
+    """
+    输出报告
+
+    参数:
+        durations: 耗时字典
+        histograms: 直方图字典
+        statuses: 状态计数字典
+    """
+    modules = sorted({module for module, _ in durations})
+    if not modules:
+        print('没有可用的指标记录')
+        return
+
+    for module in modules:
+        print(f'== {module} ==')
+        summary = ', '.join(f'{k}={v}' for k, v in sorted(statuses.get(module, {}).items()))
+        print(f'状态: {summary}')
+        print(f"{'阶段':<12}{'次数':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+        phases = sorted(name for m, name in durations if m == module)
+        # total 放在最后输出
+        phases.sort(key=lambda name: name == 'total')
+        for name in phases:
+            values = sorted(durations[(module, name)])
+            print(f'{name:<12}{len(values):>8}'
+                  f'{percentile(values, 50):>10.1f}'
+                  f'{percentile(values, 95):>10.1f}'
+                  f'{percentile(values, 99):>10.1f}'
+                  f'{values[-1]:>10.1f}')
+
+        labels = [f'<{upper}' for upper in BUCKETS] + [f'>={BUCKETS[-1]}']
+        print('总耗时分布（毫秒）:')
+        print(f"{'窗口':<18}" + ''.join(f'{label:>7}' for label in labels))
+        for window_start, counts in sorted(histograms.get(module, {}).items()):
+            label = time.strftime('%Y-%m-%d %H:%M', time.localtime(window_start))
+            print(f'{label:<18}' + ''.join(f'{count:>7}' for count in counts))
+        print()
+
+
+USAGE = '用法: python report.py [指标文件] [--window 秒数] [--module 模块路径]'
+
+
+def usage_error(message):
+    """
+    输出参数错误和用法后退出
+
+    参数:
+        message: 错误信息
+    """
+    print(message)
+    print(USAGE)
+    sys.exit(2)
+
+
+if __name__ == '__main__':
+    path = None
+    window = DEFAULT_WINDOW
+    module_filter = None
+    argv = sys.argv[1:]
+    while argv:
+        arg = argv.pop(0)
+        if arg in ('--window', '--module') and not argv:
+            usage_error(f'{arg} 缺少参数值')
+        if arg == '--window':
+            value = argv.pop(0)
+            try:
+                window = int(value)
+            except ValueError:
+                usage_error(f'--window 需要整数秒数: {value}')
+            if window <= 0:
+                usage_error(f'--window 必须大于 0: {value}')
+        elif arg == '--module':
+            module_filter = argv.pop(0)
+        else:
+            path = arg
+    try:
+        result = collect(MetricsUtils.iter_records(path), window, module_filter)
+    except FileNotFoundError:
+        print('指标文件不存在, 请先通过 Alfred 触发几次查询...')
+        sys.exit(1)
+    print_report(*result)
@@ -1,9 +1,15 @@
-import filecmp, shutil, os, sys
+import filecmp, shutil, os, sys, tempfile
  
 SRC = r'.'
 DEST = r'/Users/huangtaihong/Library/Application Support/Alfred/Alfred.alfredpreferences/workflows/user.workflow.3977AB4E-5974-487C-A288-FACBBF7362C4/'
 # 忽略的文件
 IGNORE = ['info.plist', 'icon.png']
+# 部署构建产物时从旧目录保留的文件（Alfred 配置与运行期数据）；
+# cache/ 中都是可以重建的产物（索引、快照、锁文件），不保留，新版本首次使用时重建
+PRESERVE = IGNORE + ['prefs.plist', 'alfred.log', 'alfred_metrics.jsonl', 'logo/favicons']
+# 原子交换两个路径: macOS renamex_np 的 RENAME_SWAP 和 Linux renameat2 的 RENAME_EXCHANGE 取值相同
+RENAME_SWAP = 0x2
+AT_FDCWD = -100
  
 def get_cmp_paths(dir_cmp, filenames):
     return ((os.path.join(dir_cmp.left, f), os.path.join(dir_cmp.right, f)) for f in filenames)
@@ -33,7 +39,89 @@ def sync_files(src, dest, ignore=IGNORE):
     sync(dir_cmp)
     print('文件同步已完成.')
  
+def copy_path(src, dest):
+    if os.path.isdir(src):
+        shutil.copytree(src, dest)
+    else:
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.copy2(src, dest)
+
+def exchange_paths(a, b):
+    """
+    原子交换两个路径（两者都必须存在），交换过程中不会出现任一路径不存在的时刻
+
+    参数:
+        a: 路径
+        b: 路径
+
+    返回:
+        是否交换成功，系统或文件系统不支持时返回 False
+    """
+    import ctypes
+    import ctypes.util
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        if sys.platform == 'darwin':
+            result = libc.renamex_np(os.fsencode(a), os.fsencode(b), RENAME_SWAP)
+        else:
+            result = libc.renameat2(AT_FDCWD, os.fsencode(a), AT_FDCWD, os.fsencode(b), RENAME_SWAP)
+    except (OSError, AttributeError):
+        return False
+    return result == 0
+
+def deploy_bundle(bundle, dest, preserve=PRESERVE):
+    """
+    原子部署 build.py 的构建产物
+
+    先在目标目录旁的临时目录中准备好完整的新版本（包含需要保留的文件），
+    再与旧目录原子交换，Alfred 不会看到只复制了一半或不存在的目录。
+    系统不支持原子交换时退回为两次 rename，切换失败会恢复旧目录；
+    旧版本只在切换成功后才删除
+
+    参数:
+        bundle: 构建产物目录
+        dest: workflow 目录
+        preserve: 需要从旧目录保留的文件（可选）
+    """
+    dest = os.path.normpath(dest)
+    if not os.path.isdir(bundle):
+        print('构建产物不存在, 请先执行 python build.py...')
+        return
+    staging_root = tempfile.mkdtemp(prefix='.deploy-', dir=os.path.dirname(dest))
+    staging = os.path.join(staging_root, 'workflow')
+    backup = os.path.join(staging_root, 'old')
+    try:
+        shutil.copytree(bundle, staging)
+        for name in preserve:
+            f_old = os.path.join(dest, name)
+            if os.path.exists(f_old):
+                copy_path(f_old, os.path.join(staging, name))
+                print('保留 %s' % f_old)
+        # 交换后 staging 中是旧版本，随临时目录一起删除
+        if not (os.path.exists(dest) and exchange_paths(staging, dest)):
+            if os.path.exists(dest):
+                os.rename(dest, backup)
+            try:
+                os.rename(staging, dest)
+            except OSError:
+                if os.path.exists(backup):
+                    os.rename(backup, dest)
+                raise
+    finally:
+        if os.path.exists(backup) and not os.path.exists(dest):
+            # 旧目录没能恢复，不能随临时目录删除
+            print('部署失败, 旧版本保留在 %s' % backup)
+        else:
+            shutil.rmtree(staging_root, ignore_errors=True)
+    print('构建产物部署已完成.')
+ 
 if __name__ == '__main__':
+    # python sync.py --bundle [构建产物目录] [workflow 目录]
+    if len(sys.argv) > 1 and sys.argv[1] == '--bundle':
+        bundle = sys.argv[2] if len(sys.argv) > 2 else os.path.join(SRC, 'dist', 'workflow')
+        dest = sys.argv[3] if len(sys.argv) > 3 else DEST
+        deploy_bundle(bundle, dest)
+        sys.exit(0)
     src, dest = SRC, DEST
     if len(sys.argv) == 3:
         src, dest = sys.argv[1:3]
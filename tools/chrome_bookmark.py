@@ -1,13 +1,56 @@
 import json
 import os
-import sqlite3
-import shutil
-import hashlib
-from pathlib import Path
+import re
+from utils import CancelUtils
+from utils import ChromeUtils
 
 # 图标路径常量
 BOOKMARK_ICON = {"path": "./logo/book_mark.png"}  # 默认书签图标
-FAVICONS_CACHE_DIR = Path("logo/favicons")  # 图标缓存目录
+
+# 超过该大小的书签文件使用流式解析，降低峰值内存
+STREAM_THRESHOLD = 8 * 1024 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+# 流式解析时保留的书签字段
+_STREAM_FIELDS = ('type', 'name', 'url', 'date_added', 'id')
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_JSON_SCALAR = re.compile(r'-?[0-9][0-9.eE+-]*|true|false|null')
+_JSON_FIRST_KEY = re.compile(r'\{[ \t\n\r]*"([^"\\]*)"')
+_JSON_DECODER = json.JSONDecoder()
+
+# 每页显示的结果数
+MAX_RESULTS = 10
+# 分页游标变量名：“下一页”结果项通过 Alfred variables 传递游标，
+# 再次调用 Script Filter 时以同名环境变量的形式传入
+PAGE_CURSOR_VARIABLE = "bookmark_page"
+# 排序后的完整匹配列表的缓存命名空间（书签文件变化后失效）
+PAGES_NAMESPACE = "tools.chrome_bookmark.pages"
+
+# 文件夹限定语法: in:文件夹 关键词，文件夹名包含空格时使用 in:"文件夹 名" 关键词
+_FOLDER_QUERY = re.compile(r'in:(?:"([^"]*)"|(\S*))\s*(.*)', re.IGNORECASE | re.DOTALL)
+
+# 紧凑书签文件（列式存储，以 mmap 方式打开），书签文件变化后整体重建
+COMPACT_FILE = os.path.join(ChromeUtils.CACHE_DIR, "bookmarks.compact")
+
+# 搜索引擎变量名（在 Alfred workflow 变量中配置）：
+# memory 在紧凑书签集合中查找（默认），fts 使用 SQLite FTS5 全文索引
+SEARCH_ENGINE_VARIABLE = "bookmark_search_engine"
+# FTS5 全文索引数据库，书签文件变化后整体重建
+FTS_INDEX_DB = os.path.join(ChromeUtils.CACHE_DIR, "bookmarks_fts.db")
+# trigram 分词能匹配的最短关键词长度，更短的关键词逐行扫描
+FTS_MIN_KEYWORD_LENGTH = 3
+# 全文索引结构版本（保存在 PRAGMA user_version 中），结构变化后旧索引自动重建
+FTS_SCHEMA_VERSION = 4
+# 全文索引不可用（缺少 FTS5 / trigram 分词或构建失败）的记录，书签文件和 SQLite 版本不变时不再重试
+FTS_FAILURE_FILE = FTS_INDEX_DB + ".failed"
+
+# 结果缓存策略（由 main.execute_module 处理）：
+# 同一关键词（不区分大小写）和分页游标在书签文件未变化时直接复用上一次的 getData 结果
+CACHE_POLICY = {
+    'ttl': 3600,
+    'key': lambda args: (_get_search_keyword(args).lower(), os.environ.get(PAGE_CURSOR_VARIABLE, "")),
+    # 重建期间可能使用上一代紧凑书签文件，紧凑文件替换后结果同样失效
+    'files': lambda: [_get_chrome_bookmark_path(), COMPACT_FILE]
+}
 
 def getData(args, workflow):
     """
@@ -18,7 +61,8 @@ def getData(args, workflow):
         workflow: ChangXianWorkFlow 实例
     
     返回:
-        书签数据列表（已转换为指定格式），如果出错返回 None
+        当前页数据 {'links': 当前页结果列表, 'offset': 起始位置, 'total': 匹配总数}，
+        结果中文件夹在前（type 为 folder），书签在后；没有匹配或出错返回 None
     """
     try:
         # 获取 Chrome 书签文件路径
@@ -27,20 +71,45 @@ def getData(args, workflow):
         if not bookmark_path or not os.path.exists(bookmark_path):
             return None
         
-        # 读取并解析书签文件
-        with open(bookmark_path, 'r', encoding='utf-8') as f:
-            chrome_bookmarks = json.load(f)
-        
-        # 转换为指定格式
-        converted_bookmarks = _convert_bookmarks(chrome_bookmarks)
+        search_keyword = _get_search_keyword(args)
         
-        # 如果有搜索关键词，进行过滤
-        search_keyword = args[0].strip() if args and args[0] else ""
+        offset = _get_page_offset(search_keyword)
         
-        if search_keyword:
-            converted_bookmarks = _filter_bookmarks(converted_bookmarks, search_keyword)
+        # 使用全文索引时只查询当前页和匹配总数；索引不可用时改为使用紧凑书签集合
+        if _get_search_engine() == 'fts' and not _is_fts_failed(bookmark_path):
+            import sqlite3
+            try:
+                page = _search_fts(bookmark_path, search_keyword, offset)
+            except sqlite3.Error as e:
+                _record_fts_failure(bookmark_path, e)
+                page = None
+            if page is not None:
+                return page if page['total'] else None
         
-        return converted_bookmarks
+        folder_spec, keyword = _parse_query(search_keyword)
+        bookmarks = _load_compact_bookmarks(bookmark_path)
+        try:
+            # 翻页时直接读取已保存的匹配列表，不再重新搜索
+            matches = _load_matches(bookmark_path, search_keyword, bookmarks.source_version) if offset else None
+            if matches is None:
+                # 限定文件夹时只在其先序范围内查找
+                scope = bookmarks.scope(folder_spec) if folder_spec is not None else None
+                matches = (bookmarks.search_folders(keyword, scope), bookmarks.search(keyword, scope))
+                # 超过一页时保存完整的匹配列表，供后续翻页使用
+                if len(matches[0]) + len(matches[1]) > MAX_RESULTS:
+                    _save_matches(bookmark_path, search_keyword, matches, bookmarks.source_version)
+            
+            folder_matches, link_matches = matches
+            page = _build_page(
+                len(folder_matches),
+                lambda start, limit: bookmarks.folders(folder_matches[start:start + limit]),
+                len(link_matches),
+                lambda start, limit: bookmarks.links(link_matches[start:start + limit]),
+                offset
+            )
+            return page if page['total'] else None
+        finally:
+            bookmarks.close()
     except Exception as e:
         return None
 
@@ -51,37 +120,50 @@ def parseData(workflow, data, args):
     
     参数:
         workflow: ChangXianWorkFlow 实例
-        data: getData() 返回的书签数据列表
+        data: getData() 返回的当前页数据
         args: 参数列表
     """
-    if data is None or not data:
+    if data is None or not data.get('links'):
         ifNoData(workflow, args)
         return
     
-    # 展平书签树，提取所有链接
-    links = _flatten_links(data)
+    links = data['links']
+    offset = data['offset']
+    total = data['total']
     
-    # 如果展平后没有链接，调用 ifNoData
-    if len(links) == 0:
-        ifNoData(workflow, args)
-        return
-    
-    # 限制显示数量（避免结果过多）
-    max_results = 10
-    for link in links[:max_results]:
+    for link in links:
+        # 文件夹: 回车后补全为 in:文件夹 ，继续在该文件夹中搜索
+        if link.get('type') == 'folder':
+            path = link['path']
+            workflow.add_item(
+                title=link['title'] or path,
+                subtitle=f"文件夹: {path} | {link['count']} 个书签，回车在此文件夹中搜索",
+                valid=False,
+                icon=BOOKMARK_ICON,
+                autocomplete=f'in:"{path}" ' if ' ' in path else f"in:{path} "
+            )
+            continue
+        
+        # 提取图标可能需要读取 Favicons 数据库，新的输入到达后不再继续
+        CancelUtils.check()
+        
         title = link.get('title', '无标题')
         url = link.get('url', '')
         
         # 构建副标题（显示路径和 URL）
         subtitle_parts = []
-        if link.get('path'):
-            subtitle_parts.append(f"路径: {link['path']}")
+        paths = [path for path in link.get('paths', []) if path]
+        if len(paths) > 1:
+            # 去重后的书签出现在多个文件夹中，只显示第一个
+            subtitle_parts.append(f"路径: {paths[0]} 等 {len(paths)} 处")
+        elif paths:
+            subtitle_parts.append(f"路径: {paths[0]}")
         if url:
             subtitle_parts.append(url)
         subtitle = " | ".join(subtitle_parts) if subtitle_parts else "无 URL"
         
         # 获取书签图标（如果存在）
-        icon = _get_favicon(url) or BOOKMARK_ICON
+        icon = ChromeUtils.get_favicon(url) or BOOKMARK_ICON
         
         workflow.add_item(
             title=title,
@@ -91,12 +173,19 @@ def parseData(workflow, data, args):
             arg=url
         )
     
-    if len(links) > max_results:
+    # 还有更多结果时添加“下一页”结果项，通过 variables 传递游标
+    next_offset = offset + len(links)
+    if next_offset < total:
+        search_keyword = _get_search_keyword(args)
+        page = offset // MAX_RESULTS + 1
+        pages = (total + MAX_RESULTS - 1) // MAX_RESULTS
         workflow.add_item(
-            title=f"还有 {len(links) - max_results} 个结果未显示...",
-            subtitle="请输入更精确的搜索关键词",
-            valid=False,
-            icon=BOOKMARK_ICON
+            title=f"下一页 ({page + 1}/{pages})",
+            subtitle=f"还有 {total - next_offset} 个结果，回车查看下一页",
+            valid=True,
+            icon=BOOKMARK_ICON,
+            arg=search_keyword,
+            variables={PAGE_CURSOR_VARIABLE: f"{_get_query_key(search_keyword)}:{next_offset}"}
         )
 
 
@@ -123,7 +212,13 @@ def ifNoData(workflow, args):
         args: 参数列表
     """
     search_keyword = args[0].strip() if args and args[0] else ""
-    if search_keyword:
+    folder_spec, keyword = _parse_query(search_keyword)
+    if folder_spec:
+        workflow.add_error_item(
+            "未找到匹配的书签",
+            f"文件夹: {folder_spec} | 搜索关键词: {keyword}"
+        )
+    elif search_keyword:
         workflow.add_error_item(
             "未找到匹配的书签",
             f"搜索关键词: {search_keyword}"
@@ -142,17 +237,202 @@ def _get_chrome_bookmark_path():
     返回:
         书签文件路径，如果不存在返回 None
     """
-    home = os.path.expanduser("~")
     # macOS Chrome 书签路径
-    bookmark_path = os.path.join(
-        home,
-        "Library/Application Support/Google/Chrome/Default/Bookmarks"
-    )
+    return ChromeUtils.get_profile_file("Bookmarks")
+
+
+def _get_search_keyword(args):
+    """
+    获取搜索关键词
     
-    if os.path.exists(bookmark_path):
-        return bookmark_path
+    参数:
+        args: 参数列表
     
-    return None
+    返回:
+        去除首尾空白的搜索关键词
+    """
+    return args[0].strip() if args and args[0] else ""
+
+
+def _parse_query(keyword):
+    """
+    解析文件夹限定语法 in:文件夹 关键词
+    
+    参数:
+        keyword: 搜索关键词
+    
+    返回:
+        (文件夹限定条件, 关键词)，没有使用 in: 时文件夹限定条件为 None
+    """
+    match = _FOLDER_QUERY.fullmatch(keyword)
+    if not match:
+        return None, keyword
+    folder_spec = match.group(1) if match.group(1) is not None else match.group(2)
+    return folder_spec, match.group(3).strip()
+
+
+def _build_page(folder_total, fetch_folders, link_total, fetch_links, offset):
+    """
+    组装当前页：匹配的文件夹排在书签前面，两者连续分页
+    
+    参数:
+        folder_total: 匹配的文件夹数
+        fetch_folders: 读取文件夹的函数，参数为 (起始位置, 数量)
+        link_total: 匹配的书签数
+        fetch_links: 读取书签的函数，参数为 (起始位置, 数量)
+        offset: 起始位置，越界时回到第一页
+    
+    返回:
+        当前页数据
+    """
+    total = folder_total + link_total
+    if offset >= total:
+        offset = 0
+    
+    items = fetch_folders(offset, MAX_RESULTS) if offset < folder_total else []
+    if len(items) < MAX_RESULTS:
+        items += fetch_links(max(offset - folder_total, 0), MAX_RESULTS - len(items))
+    return {
+        'links': items,
+        'offset': offset,
+        'total': total
+    }
+
+
+def _get_query_key(keyword):
+    """
+    获取查询键，用于保存和查找匹配列表（搜索不区分大小写）
+    
+    参数:
+        keyword: 搜索关键词
+    
+    返回:
+        查询键字符串
+    """
+    import zlib
+    return f"{zlib.crc32(keyword.lower().encode('utf-8')):08x}"
+
+
+def _get_page_offset(keyword):
+    """
+    从分页游标环境变量中解析当前页的起始位置
+    
+    游标格式为 "查询键:起始位置"，查询键与当前关键词不一致时（用户已修改查询）忽略游标
+    
+    参数:
+        keyword: 搜索关键词
+    
+    返回:
+        起始位置，没有有效游标时返回 0
+    """
+    cursor = os.environ.get(PAGE_CURSOR_VARIABLE, "")
+    query_key, _, offset = cursor.partition(":")
+    if query_key != _get_query_key(keyword) or not offset.isdigit():
+        return 0
+    return int(offset)
+
+
+def _save_matches(bookmark_path, keyword, matches, source_version):
+    """
+    保存排序后的完整匹配列表（文件夹编号和书签编号）
+    
+    参数:
+        bookmark_path: 书签文件路径（文件变化后列表失效）
+        keyword: 搜索关键词
+        matches: (文件夹编号数组, 书签编号数组)，均为 array('I')
+        source_version: 紧凑书签集合的源文件版本，编号只在同一版本中有效
+    """
+    from utils import MemoUtils
+    folder_matches, link_matches = matches
+    MemoUtils.save(PAGES_NAMESPACE, _get_query_key(keyword), {
+        'keyword': keyword.lower(),
+        'version': source_version,
+        'folders': folder_matches.tobytes(),
+        'links': link_matches.tobytes()
+    }, [bookmark_path])
+
+
+def _load_matches(bookmark_path, keyword, source_version):
+    """
+    读取已保存的匹配列表
+    
+    参数:
+        bookmark_path: 书签文件路径
+        keyword: 搜索关键词
+        source_version: 当前紧凑书签集合的源文件版本
+    
+    返回:
+        (文件夹编号数组, 书签编号数组)，列表不存在或已失效时返回 None
+    """
+    from array import array
+    from utils import MemoUtils
+    hit, value = MemoUtils.load(PAGES_NAMESPACE, _get_query_key(keyword), [bookmark_path])
+    # 重建期间可能使用上一代紧凑书签文件，编号不同的版本之间不通用
+    if not hit or value.get('keyword') != keyword.lower() or value.get('version') != source_version:
+        return None
+    folder_matches = array('I')
+    folder_matches.frombytes(value['folders'])
+    link_matches = array('I')
+    link_matches.frombytes(value['links'])
+    return folder_matches, link_matches
+
+
+def _load_compact_bookmarks(bookmark_path):
+    """
+    获取紧凑书签集合
+    
+    书签文件变化后由一个进程解析书签文件并重建 COMPACT_FILE，之后的请求以 mmap 方式打开，
+    不再解析书签文件。其他进程正在重建时使用格式兼容的上一代文件（结果最多落后一次修改）；
+    没有可用的上一代文件时等待重建完成，仍然不可用才在内存中构建一份不写入文件
+    
+    参数:
+        bookmark_path: 书签文件路径
+    
+    返回:
+        CompactBookmarks 实例（使用后需要 close）
+    """
+    from utils import BookmarkUtils
+    from utils import LockUtils
+    
+    source_mtime = os.stat(bookmark_path).st_mtime_ns
+    
+    def is_fresh(path):
+        return os.stat(path).st_mtime_ns == source_mtime and BookmarkUtils.CompactBookmarks.is_compatible(path)
+    
+    def build(tmp):
+        data = BookmarkUtils.CompactBookmarks.build(*_flatten_bookmarks(_load_bookmarks(bookmark_path)), source_mtime)
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.utime(tmp, ns=(source_mtime, source_mtime))
+    
+    os.makedirs(ChromeUtils.CACHE_DIR, exist_ok=True)
+    status = LockUtils.single_flight(
+        COMPACT_FILE, is_fresh, build, is_usable=BookmarkUtils.CompactBookmarks.is_compatible
+    )
+    # stale 表示其他进程正在重建，使用上一代文件；多个进程同时解析书签文件会互相拖慢
+    if status != 'missing':
+        return BookmarkUtils.CompactBookmarks.open(COMPACT_FILE)
+    return BookmarkUtils.CompactBookmarks.from_lists(
+        *_flatten_bookmarks(_load_bookmarks(bookmark_path)), source_mtime
+    )
+
+
+def _load_bookmarks(bookmark_path):
+    """
+    读取书签文件并转换为指定格式，大文件使用流式解析
+
+    参数:
+        bookmark_path: 书签文件路径
+
+    返回:
+        转换后的书签列表
+    """
+    if os.path.getsize(bookmark_path) > STREAM_THRESHOLD:
+        return _load_bookmarks_streaming(bookmark_path)
+    
+    with open(bookmark_path, 'r', encoding='utf-8') as f:
+        chrome_bookmarks = json.load(f)
+    return _convert_bookmarks(chrome_bookmarks)
 
 
 def _convert_bookmarks(chrome_bookmarks):
@@ -233,6 +513,7 @@ def _convert_node(node):
     
     # 文件夹节点
     if node_type == 'folder':
+        CancelUtils.check()
         result = {
             'type': 'folder',
             'title': node.get('name', ''),
@@ -255,225 +536,693 @@ def _convert_node(node):
             'type': 'link',
             'title': node.get('name', ''),
             'addDate': _convert_chrome_timestamp(node.get('date_added', 0)),
-            'url': node.get('url', '')
+            'url': node.get('url', ''),
+            'id': node.get('id', '')
         }
     
     return None
 
 
-def _filter_bookmarks(bookmarks, keyword):
+class _JsonTokenStream:
     """
-    过滤书签（支持书签名和 URL 搜索）
-    
+    增量 JSON 词法分析器
+
+    按块读取文件，每次返回一个词法单元，不会把整个文档读入内存。
+    不需要的字符串可以只跳过而不解码（例如 sync_metadata 这类很大的字段）
+    """
+
+    def __init__(self, f, chunk_size=STREAM_CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        """
+        读取下一块内容追加到缓冲区
+
+        返回:
+            是否读到了新内容
+        """
+        if self.eof:
+            return False
+        # 每读一块检查一次是否已被新的输入取代
+        CancelUtils.check()
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf += chunk
+        return True
+
+    def next(self, decode=True):
+        """
+        读取下一个词法单元
+
+        参数:
+            decode: 是否解码字符串和数字（可选），跳过的值不需要解码
+
+        返回:
+            (类型, 值)，类型为 { } [ ] : , str scalar 之一，文件结束返回 (None, None)
+        """
+        # 丢弃已经处理过的内容，缓冲区只保留未处理部分
+        if self.pos > self.chunk_size:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        while True:
+            self.pos = _JSON_WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                break
+            if not self._fill():
+                return None, None
+
+        c = self.buf[self.pos]
+        if c in '{}[]:,':
+            self.pos += 1
+            return c, None
+        if c == '"':
+            return 'str', self._string(decode)
+
+        # 数字与 true / false / null，可能被块边界截断，需要读到完整内容
+        while True:
+            m = _JSON_SCALAR.match(self.buf, self.pos)
+            if (m is None or m.end() == len(self.buf)) and self._fill():
+                continue
+            break
+        if m is None:
+            raise ValueError(f"无法解析的 JSON 内容: {self.buf[self.pos:self.pos + 20]!r}")
+        self.pos = m.end()
+        return 'scalar', json.loads(m.group()) if decode else None
+
+    def _string(self, decode):
+        """
+        读取一个字符串，self.pos 指向开头的引号
+
+        参数:
+            decode: 是否解码，不解码时已扫描的内容会被直接丢弃
+
+        返回:
+            解码后的字符串，不解码时返回 None
+        """
+        start = self.pos + 1
+        i = start
+        while True:
+            end = self._string_end(i)
+            if end != -1:
+                break
+            if not decode:
+                # 保留结尾的反斜杠（可能转义下一块开头的引号），前面补一个引号作为边界
+                tail = len(self.buf) - len(self.buf.rstrip('\\'))
+                self.buf = '"' + self.buf[len(self.buf) - tail:]
+                self.pos = 0
+            i = len(self.buf)
+            if not self._fill():
+                raise ValueError("JSON 字符串未结束")
+
+        if not decode:
+            self.pos = end + 1
+            return None
+        value, self.pos = json.decoder.scanstring(self.buf, start)
+        return value
+
+    def _string_end(self, i):
+        """
+        从位置 i 开始查找字符串结尾的引号（跳过被转义的引号）
+
+        返回:
+            引号位置，当前缓冲区中不存在时返回 -1
+        """
+        buf = self.buf
+        while True:
+            j = buf.find('"', i)
+            if j == -1:
+                return -1
+            # 引号前连续反斜杠为偶数个时才是字符串结尾
+            k = j - 1
+            while buf[k] == '\\':
+                k -= 1
+            if (j - 1 - k) % 2 == 0:
+                return j
+            i = j + 1
+
+    def peek_first_key(self):
+        """
+        查看下一个对象的第一个键，不移动读取位置
+
+        返回:
+            第一个键，下一个值不是对象或对象为空时返回 None
+        """
+        while True:
+            self.pos = _JSON_WHITESPACE.match(self.buf, self.pos).end()
+            m = _JSON_FIRST_KEY.match(self.buf, self.pos)
+            if m is not None:
+                return m.group(1)
+            # 内容可能被块边界截断，读取更多内容后重试
+            if len(self.buf) - self.pos > 256 or not self._fill():
+                return None
+
+    def decode_value(self):
+        """
+        使用 json 模块一次性解码下一个完整的值（用于不含子节点的小对象）
+
+        返回:
+            解码后的值
+        """
+        self.pos = _JSON_WHITESPACE.match(self.buf, self.pos).end()
+        while True:
+            try:
+                value, self.pos = _JSON_DECODER.raw_decode(self.buf, self.pos)
+                return value
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+
+    def skip_value(self, kind=None):
+        """
+        跳过一个完整的值（对象和数组按层级整体跳过，不解码其中的内容）
+
+        参数:
+            kind: 已经读取的第一个词法单元类型（可选）
+        """
+        if kind is None:
+            kind, _ = self.next(decode=False)
+        if kind not in ('{', '['):
+            return
+        depth = 1
+        while depth:
+            kind, _ = self.next(decode=False)
+            if kind in ('{', '['):
+                depth += 1
+            elif kind in ('}', ']'):
+                depth -= 1
+            elif kind is None:
+                raise ValueError("JSON 内容不完整")
+
+
+def _iter_object_keys(tokens):
+    """
+    遍历对象的键，调用方负责读取或跳过每个键对应的值
+
     参数:
-        bookmarks: 书签列表
-        keyword: 搜索关键词
-    
+        tokens: _JsonTokenStream 实例，开头的 { 已被读取
+
     返回:
-        过滤后的书签列表
+        键的生成器
     """
-    if not keyword:
-        return bookmarks
-    
-    keyword_lower = keyword.lower()
-    filtered = []
-    
-    for bookmark in bookmarks:
-        filtered_bookmark = _filter_node(bookmark, keyword_lower)
-        if filtered_bookmark:
-            filtered.append(filtered_bookmark)
-    
-    return filtered
+    while True:
+        kind, value = tokens.next()
+        if kind == '}':
+            return
+        if kind == ',':
+            continue
+        if kind != 'str' or tokens.next()[0] != ':':
+            raise ValueError("JSON 对象格式错误")
+        yield value
 
 
-def _filter_node(node, keyword):
+def _iter_stream_nodes(f):
     """
-    递归过滤书签节点（只按 title 和 url 过滤，不按文件夹名称过滤）
-    
+    流式解析 Chrome 书签文件，只保留文件夹和链接节点中用到的字段
+
+    节点按后序产出（子节点先于所在文件夹），产出时已挂到父文件夹的 children 中。
+    Chrome 按字母序写入键，children 位于 name 之前，所以父文件夹的 title
+    在其自身产出之前可能还是空字符串
+
     参数:
-        node: 书签节点对象
-        keyword: 搜索关键词（小写）
-    
+        f: 以文本模式打开的书签文件
+
     返回:
-        过滤后的节点对象，如果不匹配返回 None
+        (转换后的节点, 父文件夹元组) 的生成器，格式与 _convert_node 一致
     """
-    if not node:
-        return None
-    
-    node_type = node.get('type', '')
-    
-    # 文件夹节点：只检查子节点，不检查文件夹名称
+    tokens = _JsonTokenStream(f)
+    if tokens.next()[0] != '{':
+        raise ValueError("书签文件格式错误")
+    for key in _iter_object_keys(tokens):
+        kind, _ = tokens.next(decode=False)
+        if key != 'roots' or kind != '{':
+            tokens.skip_value(kind)
+            continue
+        for _ in _iter_object_keys(tokens):
+            kind, _ = tokens.next(decode=False)
+            if kind == '{':
+                yield from _iter_stream_node(tokens, ())
+            else:
+                tokens.skip_value(kind)
+
+
+def _iter_stream_node(tokens, parents):
+    """
+    流式解析单个书签节点及其子节点
+
+    参数:
+        tokens: _JsonTokenStream 实例，节点开头的 { 已被读取
+        parents: 父文件夹元组（文件夹上下文栈）
+
+    返回:
+        (转换后的节点, 父文件夹元组) 的生成器
+    """
+    # 文件夹节点需要在解析子节点之前创建，子节点完成时直接挂到这里
+    folder = {
+        'type': 'folder',
+        'title': '',
+        'addDate': 0,
+        'children': []
+    }
+    fields = {}
+    for key in _iter_object_keys(tokens):
+        if key == 'children':
+            kind, _ = tokens.next()
+            if kind != '[':
+                tokens.skip_value(kind)
+                continue
+            child_parents = parents + (folder,)
+            while True:
+                # Chrome 的文件夹节点以 children 开头，其余节点体积很小，
+                # 直接交给 json 模块整体解码要比逐个词法单元处理快得多
+                key = tokens.peek_first_key()
+                if key is not None and key != 'children':
+                    child = _convert_node(tokens.decode_value())
+                    if child:
+                        folder['children'].append(child)
+                        yield from _iter_converted_nodes(child, child_parents)
+                    continue
+                kind, _ = tokens.next(decode=False)
+                if kind == ']':
+                    break
+                if kind == '{':
+                    yield from _iter_stream_node(tokens, child_parents)
+                elif kind != ',':
+                    tokens.skip_value(kind)
+        elif key in _STREAM_FIELDS:
+            kind, value = tokens.next()
+            if kind in ('{', '['):
+                tokens.skip_value(kind)
+            else:
+                fields[key] = value
+        else:
+            tokens.skip_value()
+
+    node_type = fields.get('type', '')
     if node_type == 'folder':
-        # 检查子节点
-        children = node.get('children', [])
-        filtered_children = []
-        for child in children:
-            filtered_child = _filter_node(child, keyword)
-            if filtered_child:
-                filtered_children.append(filtered_child)
-        
-        # 如果有匹配的子节点，返回包含这些子节点的文件夹
-        if filtered_children:
-            result = node.copy()
-            result['children'] = filtered_children
-            return result
+        folder['title'] = fields.get('name', '')
+        folder['addDate'] = _convert_chrome_timestamp(fields.get('date_added', 0))
+        node = folder
+    elif node_type == 'url':
+        node = {
+            'type': 'link',
+            'title': fields.get('name', ''),
+            'addDate': _convert_chrome_timestamp(fields.get('date_added', 0)),
+            'url': fields.get('url', ''),
+            'id': fields.get('id', '')
+        }
+    else:
+        return
+
+    if parents:
+        parents[-1]['children'].append(node)
+    yield node, parents
 
-        return None
-    
-    # 链接节点：检查标题和 URL
-    elif node_type == 'link':
-        title = node.get('title', '').lower()
-        url = node.get('url', '').lower()
-        
-        # 检查标题或 URL 是否包含关键词
-        if keyword in title or keyword in url:
-            return node
-        
-        return None
-    
-    return None
 
+def _iter_converted_nodes(node, parents):
+    """
+    按后序产出一个已转换节点及其所有子节点
+
+    参数:
+        node: 转换后的节点
+        parents: 父文件夹元组
 
-def _flatten_links(bookmarks, path=""):
+    返回:
+        (转换后的节点, 父文件夹元组) 的生成器
     """
-    展平书签树，提取所有链接
+    if node['type'] == 'folder':
+        child_parents = parents + (node,)
+        for child in node['children']:
+            yield from _iter_converted_nodes(child, child_parents)
+    yield node, parents
+
+
+def _load_bookmarks_streaming(bookmark_path):
+    """
+    流式读取书签文件并转换为指定格式，结果与 _convert_bookmarks 一致
+
+    参数:
+        bookmark_path: 书签文件路径
+
+    返回:
+        转换后的书签列表
+    """
+    result = []
+    with open(bookmark_path, 'r', encoding='utf-8') as f:
+        for node, parents in _iter_stream_nodes(f):
+            if not parents:
+                result.append(node)
+    return result
+
+
+def _flatten_bookmarks(bookmarks):
+    """
+    按先序展平书签树，并按规范化的 URL 去重
+    
+    先序排列时每个文件夹的后代书签是链接列表中连续的一段 [link_start, link_end)，
+    后代文件夹是文件夹列表中紧随其后的一段 (自身, folder_end)，限定文件夹搜索时只需要切片。
+    第 0 个文件夹是虚拟的根目录，包含全部书签。
+    
+    URL 规范化后相同的书签（见 BookmarkUtils.normalize_url）只保留第一次出现的一条，
+    合并所有出现位置的路径和不同的标题（每个标题都可以搜到）；其他出现位置记录在 duplicates 中，供限定文件夹搜索使用
     
     参数:
         bookmarks: 书签列表
-        path: 当前路径（用于构建完整路径）
     
     返回:
-        链接列表，每个链接包含 title, url, path
+        (links, folders, duplicates)
+        links: 链接列表，每个链接包含 id, title（第一次出现的标题）, titles（所有不同的标题）, url,
+               paths（所有出现位置的路径），folder（第一次出现的文件夹编号）
+        folders: 文件夹列表，每个文件夹包含 title, path, link_start, link_end, folder_end, count（后代书签出现次数）
+        duplicates: 重复出现位置列表 [(文件夹编号, 书签编号)]
     """
+    from utils import BookmarkUtils
+    
     links = []
+    folders = []
+    duplicates = []
+    # 去重键 -> 书签编号
+    seen = {}
     
-    for bookmark in bookmarks:
-        bookmark_type = bookmark.get('type', '')
+    def visit(nodes, title, path):
+        folder_id = len(folders)
+        folder = {'title': title, 'path': path, 'link_start': len(links)}
+        folders.append(folder)
+        occurrences = len(links) + len(duplicates)
         
-        if bookmark_type == 'link':
-            # 直接添加链接
-            link = {
-                'title': bookmark.get('title', ''),
-                'url': bookmark.get('url', ''),
-                'path': path
-            }
-            links.append(link)
+        for bookmark in nodes:
+            bookmark_type = bookmark.get('type', '')
+            
+            if bookmark_type == 'link':
+                url = bookmark.get('url', '')
+                key = BookmarkUtils.normalize_url(url)
+                index = seen.get(key)
+                title = bookmark.get('title', '')
+                if index is None:
+                    seen[key] = len(links)
+                    links.append({
+                        'id': bookmark.get('id', ''),
+                        'title': title,
+                        'titles': [title],
+                        'url': url,
+                        'paths': [path],
+                        'folder': folder_id
+                    })
+                    continue
+                
+                link = links[index]
+                if title not in link['titles']:
+                    link['titles'].append(title)
+                if path not in link['paths']:
+                    link['paths'].append(path)
+                duplicates.append((folder_id, index))
+            
+            elif bookmark_type == 'folder':
+                # 递归处理文件夹
+                folder_title = bookmark.get('title', '')
+                new_path = f"{path}/{folder_title}" if path else folder_title
+                visit(bookmark.get('children', []), folder_title, new_path)
         
-        elif bookmark_type == 'folder':
-            # 递归处理文件夹
-            folder_title = bookmark.get('title', '')
-            new_path = f"{path}/{folder_title}" if path else folder_title
-            children = bookmark.get('children', [])
-            links.extend(_flatten_links(children, new_path))
+        folder['link_end'] = len(links)
+        folder['folder_end'] = len(folders)
+        folder['count'] = len(links) + len(duplicates) - occurrences
     
-    return links
+    visit(bookmarks, '', '')
+    return links, folders, duplicates
 
 
-def _get_favicon(url):
+def _get_search_engine():
     """
-    获取书签的 favicon 图标
-    
+    获取配置的搜索引擎
+
+    返回:
+        memory 或 fts
+    """
+    engine = os.environ.get(SEARCH_ENGINE_VARIABLE, "").strip().lower()
+    return engine if engine == 'fts' else 'memory'
+
+
+def _get_fts_failure_key(bookmark_path):
+    """
+    获取全文索引失败记录的键: 书签文件版本和 SQLite 版本，任一变化后重新尝试
+
     参数:
-        url: 书签 URL
-    
+        bookmark_path: 书签文件路径
+
     返回:
-        图标字典 {"path": "图标路径"}，如果不存在返回 None
+        失败记录的内容（bytes）
+    """
+    import sqlite3
+    return f"{os.stat(bookmark_path).st_mtime_ns}:{sqlite3.sqlite_version}".encode('ascii')
+
+
+def _is_fts_failed(bookmark_path):
+    """
+    判断当前书签文件的全文索引是否已经构建或查询失败过
+
+    参数:
+        bookmark_path: 书签文件路径
+
+    返回:
+        是否失败过
     """
-    if not url:
-        return None
-    
     try:
-        # 确保缓存目录存在
-        FAVICONS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
-        
-        # 使用 URL 的哈希值作为文件名
-        url_hash = hashlib.md5(url.encode('utf-8')).hexdigest()
-        icon_path = FAVICONS_CACHE_DIR / f"{url_hash}.png"
-        
-        # 如果缓存中已存在，直接返回（使用相对路径格式）
-        if icon_path.exists():
-            return {"path": f"./{icon_path}"}
-        
-        # 尝试从 Chrome Favicons 数据库提取
-        icon_data = _extract_local_icon(url)
-        
-        if icon_data:
-            # 保存到缓存目录
-            with open(icon_path, "wb") as f:
-                f.write(icon_data)
-            return {"path": f"./{icon_path}"}
-        
-        return None
-    except Exception:
-        # 发生任何错误都返回 None，使用默认图标
-        return None
+        with open(FTS_FAILURE_FILE, 'rb') as f:
+            return f.read() == _get_fts_failure_key(bookmark_path)
+    except OSError:
+        return False
 
 
-def _extract_local_icon(url):
+def _record_fts_failure(bookmark_path, error):
     """
-    从 Chrome Favicons 数据库提取图标
-    
+    记录全文索引失败，之后的请求直接使用紧凑书签集合，不再每次按键都重新解析书签文件并失败
+
     参数:
-        url: 书签 URL
-    
+        bookmark_path: 书签文件路径
+        error: sqlite3.Error 异常
+    """
+    from utils import LockUtils
+    from utils import MetricsUtils
+
+    MetricsUtils.mark('fts_error', str(error))
+    try:
+        os.makedirs(ChromeUtils.CACHE_DIR, exist_ok=True)
+        LockUtils.atomic_write(FTS_FAILURE_FILE, _get_fts_failure_key(bookmark_path))
+    except OSError:
+        pass
+
+
+def _build_fts_index(bookmark_path, index_path, source_mtime):
+    """
+    把书签镜像到 SQLite FTS5 全文索引
+
+    使用 trigram 分词，任意不少于 3 个字符的子串（包括中文）都可以通过索引匹配。
+    rowid 为书签的先序位置，按 rowid 排序与紧凑书签集合的结果顺序一致；
+    folders 表保存文件夹的先序范围，duplicates 表保存去重后书签的其他出现位置，与 CompactBookmarks 相同
+
+    参数:
+        bookmark_path: 书签文件路径
+        index_path: 索引数据库路径（临时文件，由 single_flight 替换到正式位置）
+        source_mtime: 书签文件的修改时间，写入索引文件的修改时间作为版本
+    """
+    import sqlite3
+
+    links, folders, duplicates = _flatten_bookmarks(_load_bookmarks(bookmark_path))
+    conn = sqlite3.connect(index_path)
+    try:
+        # 临时文件构建失败直接丢弃，不需要日志和同步写入
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute(f"PRAGMA user_version={FTS_SCHEMA_VERSION}")
+        conn.execute("""
+            CREATE VIRTUAL TABLE bookmarks USING fts5(
+                title, url, other_titles, path, bookmark_id UNINDEXED, search UNINDEXED, tokenize='trigram'
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE folders (
+                id INTEGER PRIMARY KEY,
+                title TEXT,
+                path TEXT,
+                search_name TEXT,
+                search_path TEXT,
+                link_start INTEGER,
+                link_end INTEGER,
+                folder_end INTEGER,
+                count INTEGER
+            )
+        """)
+        conn.execute("CREATE TABLE duplicates (folder INTEGER, link INTEGER)")
+        # other_titles 保存去重合并的其他标题（trigram 分词遇到 \0 会截断，以换行分隔），
+        # search 保存小写的标题和 URL，用于短关键词扫描和精确校验（与内存过滤的大小写规则一致）
+        conn.executemany(
+            "INSERT INTO bookmarks (rowid, title, url, other_titles, path, bookmark_id, search) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((rowid, link['title'], link['url'], "\n".join(link['titles'][1:]), "\0".join(link['paths']), link['id'],
+              "\n".join(title.lower() for title in link['titles']) + f"\n{link['url'].lower()}")
+             for rowid, link in enumerate(links))
+        )
+        conn.executemany(
+            "INSERT INTO folders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((folder_id, folder['title'], folder['path'], folder['title'].lower(), "/" + folder['path'].lower(),
+              folder['link_start'], folder['link_end'], folder['folder_end'], folder['count'])
+             for folder_id, folder in enumerate(folders))
+        )
+        conn.executemany("INSERT INTO duplicates VALUES (?, ?)", sorted(duplicates))
+        conn.execute("CREATE INDEX duplicates_folder ON duplicates (folder)")
+        conn.commit()
+    finally:
+        conn.close()
+    os.utime(index_path, ns=(source_mtime, source_mtime))
+
+
+def _is_fts_index_fresh(path, source_mtime):
+    """
+    判断全文索引是否与书签文件和当前索引结构一致
+
+    参数:
+        path: 索引数据库路径
+        source_mtime: 书签文件的修改时间
+
     返回:
-        图标二进制数据，如果不存在返回 None
+        是否为最新
     """
+    import sqlite3
+
+    if os.stat(path).st_mtime_ns != source_mtime:
+        return False
+    conn = sqlite3.connect(f"file:{path}?mode=ro&immutable=1", uri=True)
     try:
-        # 获取 Chrome 配置目录路径
-        home = os.path.expanduser("~")
-        chrome_path = Path(home) / "Library/Application Support/Google/Chrome/Default"
-        favicons_db = chrome_path / "Favicons"
-        
-        if not favicons_db.exists():
-            return None
-        
-        # 复制数据库文件以避免锁定（Chrome 可能正在使用）
-        temp_db = "temp_favicons.db"
-        wal_file = chrome_path / "Favicons-wal"
-        
-        # 复制主数据库文件
-        shutil.copy2(favicons_db, temp_db)
-        
-        # 如果存在 WAL 文件，也复制（可能包含未提交的图标数据）
-        if wal_file.exists():
-            shutil.copy2(wal_file, "temp_favicons.db-wal")
-        
-        # 连接数据库
-        conn = sqlite3.connect(temp_db)
-        cursor = conn.cursor()
-        
-        # 提取根域名，用于前缀匹配
-        domain = "/".join(url.split("/")[:3]) + "%"
-        
-        # 查询图标数据
-        query = """
-        SELECT b.image_data 
-        FROM favicon_bitmaps b
-        JOIN icon_mapping m ON m.icon_id = b.icon_id
-        WHERE m.page_url = ? OR m.page_url LIKE ?
-        ORDER BY b.width DESC LIMIT 1
-        """
-        
-        try:
-            # 先试精确匹配，再试域名匹配
-            cursor.execute(query, (url, domain))
-            result = cursor.fetchone()
-            icon_data = result[0] if result else None
-        except sqlite3.Error:
-            icon_data = None
-        finally:
-            conn.close()
-        
-        # 清理临时文件
-        for f in [temp_db, "temp_favicons.db-wal"]:
-            if os.path.exists(f):
-                try:
-                    os.remove(f)
-                except:
-                    pass
-        
-        return icon_data
-    except Exception:
-        # 发生任何错误都返回 None
+        return conn.execute("PRAGMA user_version").fetchone()[0] == FTS_SCHEMA_VERSION
+    finally:
+        conn.close()
+
+
+def _search_fts(bookmark_path, keyword, offset):
+    """
+    使用 FTS5 全文索引搜索书签（与紧凑书签集合的结果一致）
+
+    书签只按标题（包括 other_titles）和 url 匹配，文件夹按名称匹配；in: 限定文件夹时按 folders 表中的先序范围过滤 rowid。
+    索引过期时由一个进程重建，重建期间其他进程返回 None，改为使用紧凑书签集合
+
+    参数:
+        bookmark_path: 书签文件路径
+        keyword: 搜索关键词（可以包含 in: 文件夹限定）
+        offset: 起始位置
+
+    返回:
+        当前页数据（见 _build_page），索引不可用时返回 None
+    """
+    import sqlite3
+    from utils import BookmarkUtils
+    from utils import LockUtils
+
+    source_mtime = os.stat(bookmark_path).st_mtime_ns
+    os.makedirs(ChromeUtils.CACHE_DIR, exist_ok=True)
+    status = LockUtils.single_flight(
+        FTS_INDEX_DB,
+        lambda path: _is_fts_index_fresh(path, source_mtime),
+        lambda tmp: _build_fts_index(bookmark_path, tmp, source_mtime)
+    )
+    # stale 表示其他进程正在重建，旧索引的结果与当前书签文件不一致
+    if status not in ('fresh', 'built'):
         return None
+
+    folder_spec, keyword = _parse_query(keyword)
+    keyword = keyword.lower()
+    if len(keyword) >= FTS_MIN_KEYWORD_LENGTH:
+        # 只在 title、other_titles 和 url 列中匹配；trigram 的大小写折叠规则与 str.lower 略有差异，再用 search 列精确校验
+        phrase = '"' + keyword.replace('"', '""') + '"'
+        where = "bookmarks MATCH ? AND instr(search, ?) > 0"
+        params = ["{title other_titles url} : " + phrase, keyword]
+    elif keyword:
+        where = "instr(search, ?) > 0"
+        params = [keyword]
+    else:
+        where = "1"
+        params = []
+
+    # 索引只会被整体替换，以不可变方式只读打开
+    conn = sqlite3.connect(f"file:{FTS_INDEX_DB}?mode=ro&immutable=1", uri=True)
+    conn.set_progress_handler(CancelUtils.cancelled, 10000)
+    try:
+        spec = BookmarkUtils.normalize_folder_spec(folder_spec) if folder_spec is not None else ""
+        if spec:
+            # 路径以限定条件的完整若干级结尾的文件夹（search_path 以 / 开头）
+            suffix = "/" + spec
+            scope = BookmarkUtils.build_scope(conn.execute("""
+                SELECT id, link_start, link_end, folder_end FROM folders
+                WHERE substr(search_path, -length(?)) = ?
+                ORDER BY id
+            """, (suffix, suffix)))
+            # 范围内的文件夹中重复出现的书签（范围内的文件夹编号为 [自身, folder_end)）
+            scope = BookmarkUtils.extend_scope(scope, [
+                link
+                for _, _, folder_start, folder_end in scope
+                for link, in conn.execute(
+                    "SELECT link FROM duplicates WHERE folder >= ? AND folder < ?", (folder_start - 1, folder_end)
+                )
+            ])
+        else:
+            # 第 0 个文件夹是包含全部书签的虚拟根目录
+            scope = [(link_start, link_end, 1, folder_end) for link_start, link_end, folder_end in conn.execute(
+                "SELECT link_start, link_end, folder_end FROM folders WHERE id = 0"
+            )]
+
+        # 匹配的文件夹数量很少，一次全部读出
+        folders = [{
+            'type': 'folder',
+            'title': title,
+            'path': path,
+            'count': count
+        } for _, _, folder_start, folder_end in (scope if keyword else []) for title, path, count in conn.execute("""
+            SELECT title, path, count FROM folders
+            WHERE id >= ? AND id < ? AND instr(search_name, ?) > 0
+            ORDER BY id
+        """, (folder_start, folder_end, keyword))]
+        # 每个范围单独查询，FTS5 可以直接按 rowid 范围定位，避免 OR 条件退化为逐行判断
+        link_counts = [
+            conn.execute(f"SELECT count(*) FROM bookmarks WHERE {where} AND rowid >= ? AND rowid < ?",
+                         params + [link_start, link_end]).fetchone()[0]
+            for link_start, link_end, _, _ in scope
+        ]
+
+        def fetch_links(start, limit):
+            links = []
+            for (link_start, link_end, _, _), count in zip(scope, link_counts):
+                if start >= count:
+                    start -= count
+                    continue
+                links += [{
+                    'id': bookmark_id,
+                    'title': title,
+                    'url': url,
+                    'paths': paths.split('\0')
+                } for bookmark_id, title, url, paths in conn.execute(f"""
+                    SELECT bookmark_id, title, url, path FROM bookmarks
+                    WHERE {where} AND rowid >= ? AND rowid < ?
+                    ORDER BY rowid
+                    LIMIT ? OFFSET ?
+                """, params + [link_start, link_end, limit - len(links), start])]
+                start = 0
+                if len(links) >= limit:
+                    break
+            return links
+
+        return _build_page(
+            len(folders),
+            lambda start, limit: folders[start:start + limit],
+            sum(link_counts),
+            fetch_links,
+            offset
+        )
+    except sqlite3.OperationalError:
+        CancelUtils.check()
+        raise
+    finally:
+        conn.close()
@@ -0,0 +1,306 @@
+import os
+import time
+from utils import CancelUtils
+from utils import ChromeUtils
+
+# 图标路径常量
+HISTORY_ICON = {"path": "./logo/clock.png"}  # 默认历史记录图标
+
+# 本地索引数据库（只保存搜索需要的字段）
+INDEX_DB = os.path.join(ChromeUtils.CACHE_DIR, "chrome_history.db")
+# 两次增量导入之间的最小间隔（秒），避免每次按键都读取 History 数据库
+INGEST_INTERVAL = 60
+# 没有索引时等待其他进程首次建立索引的最长时间（秒）
+FIRST_BUILD_WAIT = 5
+MAX_RESULTS = 10
+# 索引格式版本，search 列的生成方式或索引结构变化后递增，旧索引会被清空并重新导入
+INDEX_VERSION = 3
+
+# Chrome 时间戳（1601-01-01 起的微秒数）与 Unix 时间戳（秒）的差值
+CHROME_EPOCH_OFFSET = 11644473600
+
+
+def getData(args, workflow):
+    """
+    搜索 Chrome 浏览历史
+
+    参数:
+        args: 参数列表，第一个参数为搜索关键词（可选），多个词之间用空格分隔
+        workflow: ChangXianWorkFlow 实例
+
+    返回:
+        按最近访问时间排序的历史记录列表，如果出错返回 None
+    """
+    try:
+        if not _update_index():
+            return None
+
+        search_keyword = args[0].strip() if args and args[0] else ""
+        results = _search(search_keyword, MAX_RESULTS)
+        return results or None
+    except Exception:
+        return None
+
+
+def parseData(workflow, data, args):
+    """
+    解析历史记录并添加到 workflow
+
+    参数:
+        workflow: ChangXianWorkFlow 实例
+        data: getData() 返回的历史记录列表
+        args: 参数列表
+    """
+    if not data:
+        ifNoData(workflow, args)
+        return
+
+    for row in data:
+        CancelUtils.check()
+        url = row['url']
+        title = row['title'] or url
+        visit_time = time.strftime("%Y-%m-%d %H:%M", time.localtime(row['last_visit']))
+        workflow.add_item(
+            title=title,
+            subtitle=f"{visit_time} | 访问 {row['visit_count']} 次 | {url}",
+            valid=True,
+            icon=ChromeUtils.get_favicon(url) or HISTORY_ICON,
+            arg=url
+        )
+
+
+def onException(args, workflow):
+    """
+    处理异常
+
+    参数:
+        args: 参数列表
+        workflow: ChangXianWorkFlow 实例
+    """
+    workflow.add_error_item(
+        "历史记录读取失败",
+        "请确保 Chrome 已安装且 History 文件存在"
+    )
+
+
+def ifNoData(workflow, args):
+    """
+    数据为空时的处理
+
+    参数:
+        workflow: ChangXianWorkFlow 实例
+        args: 参数列表
+    """
+    search_keyword = args[0].strip() if args and args[0] else ""
+    if search_keyword:
+        workflow.add_error_item(
+            "未找到匹配的历史记录",
+            f"搜索关键词: {search_keyword}"
+        )
+    else:
+        workflow.add_error_item(
+            "未找到历史记录",
+            "请检查 Chrome History 文件路径"
+        )
+
+
+def _connect_index():
+    """
+    打开本地索引数据库（WAL 模式，导入时不阻塞其他进程的查询）
+
+    返回:
+        sqlite3 连接
+    """
+    import sqlite3
+
+    os.makedirs(ChromeUtils.CACHE_DIR, exist_ok=True)
+    # 使用 URI 方式打开，ATTACH 时才能使用 immutable 等 URI 参数
+    conn = sqlite3.connect(f"file:{INDEX_DB}", uri=True, timeout=FIRST_BUILD_WAIT)
+    # SQLite 内置的 lower() 只转换 ASCII，search 列与查询一样使用 Python 的 str.lower()
+    conn.create_function('py_lower', 1, str.lower, deterministic=True)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS urls (
+            id INTEGER PRIMARY KEY,
+            url TEXT NOT NULL,
+            title TEXT,
+            visit_count INTEGER,
+            last_visit_time INTEGER,
+            search TEXT
+        );
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER);
+    """)
+    return conn
+
+
+def _update_index():
+    """
+    增量更新本地索引
+
+    只导入 id 大于上次最大 id（新增网址）或 last_visit_time 晚于上次最大访问时间
+    （再次访问的网址）的行，并删除 History 中已不存在的行；History（包括其 WAL 文件）
+    未变化或距上次导入不足 INGEST_INTERVAL 秒时跳过，索引格式版本变化时立即重新导入。
+    同一时间只有一个进程导入，其他进程直接查询现有索引。
+    已被新的输入取代的请求不再开始导入；导入开始后在取消保护区内完成
+
+    返回:
+        索引是否可用
+    """
+    from utils import LockUtils
+
+    history_db = ChromeUtils.get_profile_file("History")
+    if not history_db:
+        return os.path.exists(INDEX_DB)
+
+    conn = _connect_index()
+    try:
+        meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        source_mtime = ChromeUtils.get_database_mtime(history_db)
+        current = meta.get('version') == INDEX_VERSION
+        if current and meta.get('source_mtime') == source_mtime:
+            return True
+        if current and time.time() - meta.get('checked_at', 0) < INGEST_INTERVAL:
+            return True
+
+        CancelUtils.check()
+        # 已有索引时不等待正在导入的进程，没有索引时等待首次导入完成
+        lock = LockUtils.FileLock(INDEX_DB + ".lock")
+        if not lock.acquire(timeout=0 if meta else FIRST_BUILD_WAIT):
+            return bool(meta)
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+            if meta.get('version') != INDEX_VERSION or meta.get('source_mtime') != source_mtime:
+                with CancelUtils.shield():
+                    _ingest(conn, history_db, meta, source_mtime)
+        finally:
+            lock.release()
+        return True
+    finally:
+        conn.close()
+
+
+def _ingest(conn, history_db, meta, source_mtime):
+    """
+    从 History 数据库导入新增和更新的行，删除已不存在的行
+
+    优先以不可变方式直接只读打开 History，避免复制整个数据库；
+    不可变方式会忽略 WAL 文件，History 有未合并的 WAL 数据或 Chrome 正在写入导致读取失败时，
+    改为从快照导入（快照已合并 WAL）
+
+    参数:
+        conn: 本地索引连接
+        history_db: History 数据库路径
+        meta: 上次导入的元数据
+        source_mtime: History 文件的修改时间
+    """
+    import sqlite3
+    from pathlib import Path
+
+    # 索引格式版本不一致（包括首次导入）时清空旧数据，全部重新导入
+    rebuild = meta.get('version') != INDEX_VERSION
+    last_id = 0 if rebuild else meta.get('last_id', 0)
+    last_visit_time = 0 if rebuild else meta.get('last_visit_time', 0)
+
+    sources = []
+    if not ChromeUtils.has_pending_wal(history_db):
+        sources.append(Path(os.path.abspath(history_db)).as_uri() + "?mode=ro&immutable=1")
+    sources.append(lambda: ChromeUtils.snapshot_database("History"))
+    for source in sources:
+        if callable(source):
+            snapshot = source()
+            if not snapshot:
+                raise sqlite3.DatabaseError("History 快照不可用")
+            source = Path(os.path.abspath(snapshot)).as_uri() + "?mode=ro&immutable=1"
+        try:
+            conn.execute("ATTACH DATABASE ? AS src", (source,))
+        except sqlite3.Error:
+            continue
+        try:
+            with conn:
+                if rebuild:
+                    conn.execute("DELETE FROM urls")
+                    # 搜索用的覆盖索引：按访问时间倒序扫描时不需要再回表读取每一行
+                    conn.execute("DROP INDEX IF EXISTS urls_last_visit_time")
+                    conn.execute("""
+                        CREATE INDEX IF NOT EXISTS urls_recent
+                        ON urls(last_visit_time, search, url, title, visit_count)
+                    """)
+                # History 被清空（最大 id 变小）时重新导入全部数据
+                max_id = conn.execute("SELECT IFNULL(MAX(id), 0) FROM src.urls").fetchone()[0]
+                if max_id < last_id:
+                    conn.execute("DELETE FROM urls")
+                    last_id = last_visit_time = 0
+                conn.execute("""
+                    INSERT OR REPLACE INTO urls (id, url, title, visit_count, last_visit_time, search)
+                    SELECT id, url, title, visit_count, last_visit_time, py_lower(IFNULL(title, '') || ' ' || url)
+                    FROM src.urls
+                    WHERE (id > ? OR last_visit_time > ?) AND hidden = 0
+                """, (last_id, last_visit_time))
+                # 在 Chrome 中删除（或隐藏）的网址：导入后行数与 History 中的可见行数不一致时
+                # 才按主键反连接查找，避免每次导入都检查整个索引
+                visible = conn.execute("SELECT count(*) FROM src.urls WHERE hidden = 0").fetchone()[0]
+                if conn.execute("SELECT count(*) FROM urls").fetchone()[0] != visible:
+                    conn.execute("""
+                        DELETE FROM urls
+                        WHERE NOT EXISTS (SELECT 1 FROM src.urls s WHERE s.id = urls.id AND s.hidden = 0)
+                    """)
+                # 分开查询才能分别使用主键和访问时间索引，不扫描整个索引
+                local_max_id = conn.execute("SELECT IFNULL(MAX(id), 0) FROM urls").fetchone()[0]
+                local_max_visit = conn.execute("SELECT IFNULL(MAX(last_visit_time), 0) FROM urls").fetchone()[0]
+                conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+                    ('last_id', max(local_max_id, max_id)),
+                    ('last_visit_time', local_max_visit),
+                    ('source_mtime', source_mtime),
+                    ('version', INDEX_VERSION),
+                    ('checked_at', int(time.time()))
+                ])
+            return
+        except sqlite3.DatabaseError:
+            continue
+        finally:
+            conn.execute("DETACH DATABASE src")
+    raise sqlite3.DatabaseError("History 数据库读取失败")
+
+
+def _search(keyword, limit):
+    """
+    在本地索引中搜索历史记录
+
+    关键词按空格拆分，每个词都需要出现在标题或 URL 中（不区分大小写），
+    结果按最近访问时间倒序排列。按访问时间的覆盖索引倒序扫描，找满 limit 条即停止，
+    关键词很少匹配时也只读取索引，不回表
+
+    参数:
+        keyword: 搜索关键词
+        limit: 最大返回条数
+
+    返回:
+        历史记录列表，每条包含 url, title, visit_count, last_visit（Unix 时间戳，秒）
+    """
+    import sqlite3
+
+    tokens = keyword.lower().split()
+    where = " AND ".join("instr(search, ?) > 0" for _ in tokens) or "1"
+    conn = _connect_index()
+    # 关键词很少匹配时需要扫描整个索引，被新的输入取代后中断查询
+    conn.set_progress_handler(CancelUtils.cancelled, 10000)
+    try:
+        rows = conn.execute(f"""
+            SELECT url, title, visit_count, last_visit_time
+            FROM urls
+            WHERE last_visit_time > 0 AND {where}
+            ORDER BY last_visit_time DESC
+            LIMIT ?
+        """, tokens + [limit]).fetchall()
+    except sqlite3.OperationalError:
+        CancelUtils.check()
+        raise
+    finally:
+        conn.close()
+
+    return [{
+        'url': url,
+        'title': title,
+        'visit_count': visit_count,
+        'last_visit': last_visit_time / 1000000 - CHROME_EPOCH_OFFSET
+    } for url, title, visit_count, last_visit_time in rows]
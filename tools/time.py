@@ -1,20 +1,56 @@
 import re
 import time
+from functools import lru_cache
 
 
 # 图标路径常量
 CLOCK_ICON = {"path": "./logo/clock.png"}
 
+# Chrome/WebKit 时间戳（1601-01-01 起的微秒数）与 Unix 时间戳（秒）的差值
+CHROME_EPOCH_OFFSET = 11644473600
+# 解析结果缓存的最大条目数
+PARSE_CACHE_SIZE = 256
+
+_DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+_MONTH_NAMES = {
+    name: index for index, name in enumerate(
+        ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), 1
+    )
+}
+# RFC 2822 时区缩写对应的 UTC 偏移（小时）
+_ZONE_NAMES = {
+    'Z': 0, 'UT': 0, 'UTC': 0, 'GMT': 0,
+    'EST': -5, 'EDT': -4, 'CST': -6, 'CDT': -5, 'MST': -7, 'MDT': -6, 'PST': -8, 'PDT': -7
+}
+_RELATIVE_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+_RELATIVE_PART = re.compile(r'\s*([+-]?)\s*(\d+)\s*([smhdw])', re.IGNORECASE)
+
+# 时间戳数量级规则 (上限, 除数, 纪元偏移)，按整数部分从小到大依次匹配:
+# - 小于 1e11（11 位及以下）: 秒，最大到 5138 年
+# - 小于 1e14（12-14 位）: 毫秒
+# - 小于 1e16（15-16 位）: 微秒，最大到 2286 年
+# - 小于 1e17（17 位）: Chrome/WebKit 微秒（1601-01-01 起），当前约为 1.3e16 ~ 1.4e16 之间的 17 位数
+# - 小于 1e20（18-20 位）: 纳秒
+_EPOCH_RULES = (
+    (10 ** 11, 1, 0),
+    (10 ** 14, 10 ** 3, 0),
+    (10 ** 16, 10 ** 6, 0),
+    (10 ** 17, 10 ** 6, CHROME_EPOCH_OFFSET),
+    (10 ** 20, 10 ** 9, 0),
+)
+
 
 def getData(args, workflow):
     """
     获取时间数据
     
     支持的输入格式:
-    - 'now': 当前时间戳
+    - 'now' / 'now-1d' / 'now+2h30m': 当前时间及相对时间（单位 s / m / h / d / w）
     - '2024-01-01': 日期格式
     - '2024-01-01 12:00:00': 日期时间格式
-    - '1234567890': 时间戳（秒或毫秒）
+    - '2024-01-01T12:00:00.123+08:00': ISO 8601（可带小数秒和时区）
+    - 'Mon, 01 Jan 2024 12:00:00 +0800': RFC 2822
+    - '1234567890': 时间戳，按数量级识别秒 / 毫秒 / 微秒 / Chrome 微秒 / 纳秒（见 _EPOCH_RULES）
     
     参数:
         args: 参数列表，第一个参数为时间输入
@@ -106,7 +142,7 @@ def ifNoData(workflow, args):
     """
     workflow.add_error_item(
         "时间格式错误",
-        "支持的格式: now | 2024-01-01 | 2024-01-01 12:00:00 | 时间戳"
+        "支持的格式: now-1d | 2024-01-01 12:00:00 | ISO 8601 | RFC 2822 | 时间戳（秒/毫秒/微秒/纳秒/Chrome）"
     )
 
 
@@ -123,36 +159,186 @@ def _format_time(input_time):
     if not input_time:
         return None
     
-    input_time = input_time.strip()
-    
-    # 当前时间
-    if input_time == 'now':
-        return time.time()
-    
-    # 日期格式: 2024-01-01
-    if re.match(r"^\d{4}-\d{2}-\d{2}$", input_time):
-        try:
-            return time.mktime(time.strptime(input_time, '%Y-%m-%d'))
-        except ValueError:
-            return None
-    
-    # 日期时间格式: 2024-01-01 12:00:00
-    if re.match(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$", input_time):
-        try:
-            return time.mktime(time.strptime(input_time, '%Y-%m-%d %H:%M:%S'))
-        except ValueError:
-            return None
-    
-    # 时间戳格式: 纯数字
-    if re.match(r"^\d+$", input_time):
-        try:
-            timestamp = int(input_time)
-            # 如果时间戳大于 253402185600（约 1978年），可能是毫秒，转换为秒
-            # 253402185600 是 1978-01-01 00:00:00 的时间戳（秒）
-            if timestamp > 253402185600:
-                timestamp = timestamp / 1000
-            return timestamp
-        except ValueError:
-            return None
-    
-    return None
\ No newline at end of file
+    result = _parse_time(input_time.strip())
+    if result is None:
+        return None
+    
+    # 相对时间只缓存偏移量，每次基于当前时间计算
+    kind, value = result
+    if kind == 'relative':
+        return time.time() + value
+    return value
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_time(text):
+    """
+    解析时间输入（结果与当前时间无关，可以缓存）
+    
+    所有格式合并为一个预编译的正则，按匹配到的分组名（lastgroup）分派给对应的处理函数
+    
+    参数:
+        text: 去除首尾空白的时间输入
+    
+    返回:
+        ('absolute', 时间戳（秒）) 或 ('relative', 相对当前时间的偏移秒数)，格式无效返回 None
+    """
+    match = _TIME_PATTERN.fullmatch(text)
+    if not match:
+        return None
+    return _TIME_HANDLERS[match.lastgroup](match)
+
+
+def _is_leap_year(year):
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+def _is_valid_datetime(year, month, day, hour, minute, second):
+    """
+    校验日期时间各字段的范围（例如拒绝 2023-02-29 和 25:00）
+    
+    返回:
+        是否有效
+    """
+    if not 1 <= month <= 12 or day < 1:
+        return False
+    days = _DAYS_IN_MONTH[month - 1] + (month == 2 and _is_leap_year(year))
+    # 秒允许到 61，与 time.strptime 一致（闰秒）
+    return day <= days and hour < 24 and minute < 60 and second <= 61
+
+
+def _utc_timestamp(year, month, day, hour, minute, second):
+    """
+    UTC 日期时间转换为时间戳（秒），不依赖本地时区和 calendar 模块
+    
+    返回:
+        时间戳（秒）
+    """
+    # 公历日期转换为 1970-01-01 起的天数（days_from_civil 算法，以 3 月为一年的开始）
+    y = year - (month <= 2)
+    era = y // 400
+    year_of_era = y - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    days = era * 146097 + day_of_era - 719468
+    return days * 86400 + hour * 3600 + minute * 60 + second
+
+
+def _to_timestamp(year, month, day, hour, minute, second, offset):
+    """
+    日期时间转换为时间戳（秒）
+    
+    参数:
+        year, month, day, hour, minute, second: 日期时间各字段
+        offset: 时区偏移（秒），None 表示本地时间
+    
+    返回:
+        ('absolute', 时间戳)，日期时间无效返回 None
+    """
+    if not _is_valid_datetime(year, month, day, hour, minute, second):
+        return None
+    if offset is not None:
+        return 'absolute', _utc_timestamp(year, month, day, hour, minute, second) - offset
+    try:
+        return 'absolute', time.mktime((year, month, day, hour, minute, second, 0, 0, -1))
+    except (OverflowError, ValueError):
+        return None
+
+
+def _parse_relative(match):
+    """
+    相对时间: now、now-1d、now+2h30m
+    """
+    offset = 0
+    sign = 1
+    for operator, amount, unit in _RELATIVE_PART.findall(match.group('relative_parts')):
+        if operator:
+            sign = -1 if operator == '-' else 1
+        offset += sign * int(amount) * _RELATIVE_UNITS[unit.lower()]
+    return 'relative', offset
+
+
+def _parse_zone(zone):
+    """
+    解析时区: Z、+08、+08:00、+0800 以及 RFC 2822 的时区缩写
+    
+    返回:
+        相对 UTC 的偏移（秒），没有时区或偏移超出范围（小时大于 23、分钟大于 59）返回 None
+    """
+    if not zone:
+        return None
+    zone = zone.upper()
+    if zone in _ZONE_NAMES:
+        return _ZONE_NAMES[zone] * 3600
+    sign = -1 if zone[0] == '-' else 1
+    digits = zone[1:].replace(':', '')
+    hours = int(digits[:2])
+    minutes = int(digits[2:]) if len(digits) > 2 else 0
+    if hours > 23 or minutes > 59:
+        return None
+    return sign * (hours * 3600 + minutes * 60)
+
+
+def _parse_iso(match):
+    """
+    ISO 8601: 2024-01-01、2024-01-01 12:00:00、2024-01-01T12:00:00.123+08:00
+    """
+    zone = match.group('iso_zone')
+    offset = _parse_zone(zone)
+    if zone and offset is None:
+        return None
+    result = _to_timestamp(
+        int(match.group('iso_year')), int(match.group('iso_month')), int(match.group('iso_day')),
+        int(match.group('iso_hour') or 0), int(match.group('iso_minute') or 0),
+        int(match.group('iso_second') or 0), offset
+    )
+    fraction = match.group('iso_fraction')
+    if result is None or not fraction:
+        return result
+    return 'absolute', result[1] + float('0.' + fraction[1:])
+
+
+def _parse_rfc2822(match):
+    """
+    RFC 2822: Mon, 01 Jan 2024 12:00:00 +0800（星期、秒和时区可省略，省略时区按本地时间）
+    """
+    zone = match.group('rfc_zone')
+    offset = _parse_zone(zone)
+    if zone and offset is None:
+        return None
+    return _to_timestamp(
+        int(match.group('rfc_year')), _MONTH_NAMES[match.group('rfc_month').lower()], int(match.group('rfc_day')),
+        int(match.group('rfc_hour')), int(match.group('rfc_minute')),
+        int(match.group('rfc_second') or 0), offset
+    )
+
+
+def _parse_epoch(match):
+    """
+    时间戳: 按 _EPOCH_RULES 的数量级规则识别单位
+    """
+    text = match.group('epoch')
+    value = float(text) if '.' in text else int(text)
+    for limit, divisor, epoch_offset in _EPOCH_RULES:
+        if value < limit:
+            return 'absolute', (value if divisor == 1 else value / divisor) - epoch_offset
+    return None
+
+
+# 格式表: (分组名, 正则, 处理函数)。各格式的子分组以分组名为前缀，避免重名
+_TIME_FORMATS = (
+    ('relative', r'now(?P<relative_parts>(?:\s*[+-]\s*\d+\s*[smhdw](?:\s*\d+\s*[smhdw])*)*)', _parse_relative),
+    ('iso', r'(?P<iso_year>\d{4})-(?P<iso_month>\d{2})-(?P<iso_day>\d{2})'
+            r'(?:[T ](?P<iso_hour>\d{2}):(?P<iso_minute>\d{2})'
+            r'(?::(?P<iso_second>\d{2})(?P<iso_fraction>[.,]\d+)?)?'
+            r'\s*(?P<iso_zone>Z|[+-]\d{2}(?::?\d{2})?)?)?', _parse_iso),
+    ('rfc', r'(?:[a-z]{3},\s*)?(?P<rfc_day>\d{1,2})\s+'
+            r'(?P<rfc_month>jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s+(?P<rfc_year>\d{4})\s+'
+            r'(?P<rfc_hour>\d{2}):(?P<rfc_minute>\d{2})(?::(?P<rfc_second>\d{2}))?'
+            r'(?:\s*(?P<rfc_zone>[+-]\d{4}|UTC?|GMT|Z|[ECMP][SD]T))?', _parse_rfc2822),
+    ('epoch', r'\d+(?:\.\d+)?', _parse_epoch),
+)
+_TIME_PATTERN = re.compile(
+    '|'.join(f'(?P<{name}>{pattern})' for name, pattern, _ in _TIME_FORMATS), re.IGNORECASE
+)
+_TIME_HANDLERS = {name: handler for name, _, handler in _TIME_FORMATS}
@@ -0,0 +1,499 @@
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from bisect import bisect_right
+
+from utils import CancelUtils
+
+# 紧凑书签文件格式
+MAGIC = b'CXBM'
+VERSION = 5
+# 文件头: 魔数、版本、字节序（0 小端 / 1 大端）、书签数、文件夹数、重复出现数、源文件版本，
+# 以及 15 个分段的起始位置。
+# 偏移数组按本机字节序保存，字节序不同的文件视为不兼容（缓存文件只在本机使用）
+_HEADER = struct.Struct('<4sIIIIIQ15Q')
+_BYTEORDER = 0 if sys.byteorder == 'little' else 1
+
+# 去重时视为相同的 URL 协议
+_WEB_SCHEMES = ('http', 'https')
+# 去重时忽略的跟踪参数前缀（小写）
+_TRACKING_PARAM_PREFIX = 'utm_'
+
+
+def _pad(size):
+    """
+    计算 4 字节对齐需要的填充长度，保证 uint32 分段可以直接映射为数组
+    """
+    return -size % 4
+
+
+def _pack_strings(strings):
+    """
+    把字符串列表打包为 (uint32 偏移数组, 拼接后的 UTF-8 字节块) 两个分段
+    """
+    offsets = array('I', [0])
+    parts = []
+    size = 0
+    for string in strings:
+        encoded = string.encode('utf-8')
+        parts.append(encoded)
+        size += len(encoded)
+        offsets.append(size)
+    return [offsets.tobytes(), b''.join(parts)]
+
+
+def normalize_folder_spec(spec):
+    """
+    规范化文件夹限定条件: 不区分大小写，忽略首尾的 /
+
+    参数:
+        spec: 文件夹限定条件，例如 Work/Infra
+
+    返回:
+        规范化后的字符串
+    """
+    return spec.strip().strip('/').lower()
+
+
+def normalize_url(url):
+    """
+    计算书签 URL 的去重键
+
+    只处理 http/https: 忽略协议、主机名大小写、路径末尾的 /、utm_* 跟踪参数和锚点，
+    以 #/ 或 #! 开头的锚点是单页应用的路由，保留。其他协议（javascript:、chrome:// 等）原样返回
+
+    参数:
+        url: 书签 URL
+
+    返回:
+        去重键，去重键相同的书签视为同一个
+    """
+    scheme, separator, rest = url.partition('://')
+    if not separator or scheme.lower() not in _WEB_SCHEMES:
+        return url
+    rest, separator, fragment = rest.partition('#')
+    rest, _, query = rest.partition('?')
+    host, _, path = rest.partition('/')
+    key = host.lower() + '/' + path.rstrip('/')
+    if query:
+        params = [param for param in query.split('&')
+                  if param and not param.lower().startswith(_TRACKING_PARAM_PREFIX)]
+        if params:
+            key += '?' + '&'.join(params)
+    if separator and fragment[:1] in ('/', '!'):
+        key += '#' + fragment
+    return key
+
+
+def build_scope(folders):
+    """
+    把匹配到的文件夹合并为搜索范围，嵌套在其他匹配文件夹中的文件夹不重复计入
+
+    参数:
+        folders: 按先序编号排列的 (文件夹编号, link_start, link_end, folder_end)
+
+    返回:
+        范围列表 [(link_start, link_end, 后代文件夹起始编号, folder_end)]
+    """
+    scope = []
+    for folder_id, link_start, link_end, folder_end in folders:
+        if scope and folder_id < scope[-1][3]:
+            continue
+        scope.append((link_start, link_end, folder_id + 1, folder_end))
+    return scope
+
+
+def extend_scope(scope, links):
+    """
+    把范围内文件夹中重复出现、但保存在范围之外的书签作为单独的范围加入
+
+    去重后每个书签只保存在第一次出现的位置，其他出现位置记录为 (文件夹编号, 书签编号)
+
+    参数:
+        scope: build_scope() 返回的范围列表
+        links: 在范围内的文件夹中重复出现的书签编号
+
+    返回:
+        按书签编号排列的范围列表，加入的范围不包含文件夹
+    """
+    starts = [link_start for link_start, _, _, _ in scope]
+    extra = set()
+    for link in links:
+        i = bisect_right(starts, link) - 1
+        if i < 0 or link >= scope[i][1]:
+            extra.add(link)
+    if not extra:
+        return scope
+    return sorted(scope + [(link, link + 1, 0, 0) for link in extra])
+
+
+class _StringColumn:
+    """
+    一列字符串: uint32 偏移数组 + 拼接后的字节块，第 i 条为 blob[offsets[i]:offsets[i + 1]]
+    """
+
+    __slots__ = ('buffer', 'offsets', 'start')
+
+    def __init__(self, buffer, view, offsets_at, blob_at, count):
+        self.buffer = buffer
+        self.offsets = view[offsets_at:offsets_at + (count + 1) * 4].cast('I')
+        self.start = blob_at
+
+    def get(self, index):
+        """
+        读取第 index 条（未解码的字节串）
+        """
+        return self.buffer[self.start + self.offsets[index]:self.start + self.offsets[index + 1]]
+
+    def find(self, needle, first, last):
+        """
+        在第 first 到 last - 1 条中查找包含 needle 的记录，直接在整块字节上查找
+
+        参数:
+            needle: 要查找的字节串
+            first: 起始编号
+            last: 结束编号（不包含）
+
+        返回:
+            按编号排列的记录编号数组 array('I')，每条记录最多出现一次
+        """
+        buffer = self.buffer
+        offsets = self.offsets
+        base = self.start
+        end = base + offsets[last]
+        matches = array('I')
+        position = buffer.find(needle, base + offsets[first], end)
+        while position != -1:
+            # 找到所在的记录后直接跳到下一条记录，同一条记录多处匹配时只记录一次
+            index = bisect_right(offsets, position - base, first, last) - 1
+            matches.append(index)
+            if not len(matches) & 0x3ff:
+                CancelUtils.check()
+            position = buffer.find(needle, base + offsets[index + 1], end)
+        return matches
+
+
+class CompactBookmarks:
+    """
+    紧凑的列式书签集合
+
+    书签和文件夹都按先序位置编号，各列保存在一整块缓冲区中:
+    - 书签搜索列: 小写的 "标题\\0URL\\0"（去重合并的书签包含所有标题，UTF-8），搜索时直接在整块字节上查找，
+      不需要为每个书签创建对象；UTF-8 字节子串匹配与字符串子串匹配等价
+    - 书签记录列: 原始的 "id\\0标题\\0URL"，只有展示的书签才解码
+    - 书签所在文件夹编号（uint32）和其他出现位置的路径列 "路径\\0路径"
+    - 文件夹记录列 "名称\\0路径"、小写名称搜索列 "名称\\0"、小写路径列 "/路径\\0"
+    - 文件夹范围（uint32 × 4）: 后代书签 [link_start, link_end)，后代文件夹 (自身, folder_end)，后代书签出现次数
+    - 重复出现位置: 按文件夹编号排序的文件夹编号和书签编号（uint32 各一列）
+    先序编号下每个文件夹的后代都是连续的一段，限定文件夹搜索只需要缩小查找的字节范围。
+    URL 相同的书签只保存第一次出现的一条，其他出现位置在限定文件夹搜索时按文件夹编号查找。
+    第 0 个文件夹是虚拟的根目录，包含全部书签。
+
+    序列化结果可以直接写入文件，以只读 mmap 打开后无需解析即可搜索，读取的开销与书签数量无关
+    """
+
+    __slots__ = ('count', 'folder_count', 'source_version', '_buffer', '_mmap', '_views', '_link_search', '_link_records',
+                 '_link_folders', '_link_paths', '_folder_records', '_folder_names', '_folder_paths',
+                 '_folder_ranges', '_duplicate_folders', '_duplicate_links')
+
+    def __init__(self, buffer, mapped=None):
+        """
+        参数:
+            buffer: build() 生成的字节串或其 mmap
+            mapped: buffer 为 mmap 时传入，close() 时关闭（可选）
+        """
+        (magic, version, byteorder, count, folder_count, duplicate_count, source_version,
+         *sections) = _HEADER.unpack_from(buffer)
+        if magic != MAGIC or version != VERSION or byteorder != _BYTEORDER:
+            raise ValueError("书签文件格式不兼容")
+
+        view = memoryview(buffer)
+        self.count = count
+        self.folder_count = folder_count
+        self.source_version = source_version
+        self._buffer = buffer
+        self._mmap = mapped
+        self._link_search = _StringColumn(buffer, view, sections[0], sections[1], count)
+        self._link_records = _StringColumn(buffer, view, sections[2], sections[3], count)
+        self._link_folders = view[sections[4]:sections[4] + count * 4].cast('I')
+        self._link_paths = _StringColumn(buffer, view, sections[5], sections[6], count)
+        self._folder_records = _StringColumn(buffer, view, sections[7], sections[8], folder_count)
+        self._folder_names = _StringColumn(buffer, view, sections[9], sections[10], folder_count)
+        self._folder_paths = _StringColumn(buffer, view, sections[11], sections[12], folder_count)
+        self._folder_ranges = view[sections[13]:sections[13] + folder_count * 16].cast('I')
+        duplicates = view[sections[14]:sections[14] + duplicate_count * 8].cast('I')
+        self._duplicate_folders = duplicates[:duplicate_count]
+        self._duplicate_links = duplicates[duplicate_count:]
+        self._views = [column.offsets for column in (
+            self._link_search, self._link_records, self._link_paths,
+            self._folder_records, self._folder_names, self._folder_paths
+        )] + [self._link_folders, self._folder_ranges, self._duplicate_folders, self._duplicate_links, duplicates]
+
+    @staticmethod
+    def build(links, folders, duplicates, source_version=0):
+        """
+        把展平后的书签序列化为紧凑格式
+
+        参数:
+            links: 按先序排列的去重后的链接列表，每个链接包含 id, title, titles（合并后的所有标题）, url,
+                   paths（所有出现位置的路径），
+                   folder（第一次出现的文件夹编号）
+            folders: 按先序排列的文件夹列表，每个文件夹包含 title, path, link_start, link_end, folder_end, count，
+                     第 0 个为虚拟根目录
+            duplicates: 重复出现位置列表 [(文件夹编号, 书签编号)]
+            source_version: 源文件版本（可选，例如书签文件的修改时间），用于判断基于本集合保存的数据是否仍然有效
+
+        返回:
+            序列化后的字节串
+        """
+        link_folders = array('I', (link['folder'] for link in links))
+        folder_ranges = array('I')
+        for folder in folders:
+            folder_ranges.extend((folder['link_start'], folder['link_end'], folder['folder_end'], folder['count']))
+        duplicates = sorted(duplicates)
+        duplicate_columns = array('I', (folder_id for folder_id, _ in duplicates))
+        duplicate_columns.extend(link for _, link in duplicates)
+
+        sections = (
+            # 各个标题、URL 之间以 \0 分隔（关键词中不会出现），匹配不会跨越字段
+            _pack_strings("".join(f"{title.lower()}\0" for title in link['titles']) + f"{link['url'].lower()}\0"
+                          for link in links)
+            + _pack_strings(f"{link['id']}\0{link['title']}\0{link['url']}" for link in links)
+            + [link_folders.tobytes()]
+            + _pack_strings('\0'.join(link['paths'][1:]) for link in links)
+            + _pack_strings(f"{folder['title']}\0{folder['path']}" for folder in folders)
+            + _pack_strings(f"{folder['title'].lower()}\0" for folder in folders)
+            # 路径前加 /，查找 "/限定条件\0" 即可匹配以完整的若干级文件夹结尾的路径
+            + _pack_strings(f"/{folder['path'].lower()}\0" for folder in folders)
+            + [folder_ranges.tobytes(), duplicate_columns.tobytes()]
+        )
+        chunks = []
+        starts = []
+        position = _HEADER.size
+        for section in sections:
+            starts.append(position)
+            chunks.append(section)
+            chunks.append(b'\0' * _pad(len(section)))
+            position += len(section) + _pad(len(section))
+
+        header = _HEADER.pack(MAGIC, VERSION, _BYTEORDER, len(links), len(folders), len(duplicates), source_version,
+                              *starts)
+        return header + b''.join(chunks)
+
+    @classmethod
+    def from_lists(cls, links, folders, duplicates, source_version=0):
+        """
+        在内存中创建紧凑书签集合（不写入文件）
+
+        参数:
+            links: 按先序排列的去重后的链接列表
+            folders: 按先序排列的文件夹列表
+            duplicates: 重复出现位置列表
+            source_version: 源文件版本（可选）
+
+        返回:
+            CompactBookmarks 实例
+        """
+        return cls(cls.build(links, folders, duplicates, source_version))
+
+    @classmethod
+    def open(cls, path):
+        """
+        以只读 mmap 方式打开紧凑书签文件
+
+        参数:
+            path: 文件路径
+
+        返回:
+            CompactBookmarks 实例
+        """
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls(mapped, mapped)
+        except Exception:
+            mapped.close()
+            raise
+
+    @staticmethod
+    def is_compatible(path):
+        """
+        判断文件是否为当前版本的紧凑书签文件
+
+        参数:
+            path: 文件路径
+
+        返回:
+            是否兼容
+        """
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(_HEADER.size)
+            magic, version, byteorder = _HEADER.unpack(header)[:3]
+        except (OSError, struct.error):
+            return False
+        return magic == MAGIC and version == VERSION and byteorder == _BYTEORDER
+
+    def close(self):
+        """
+        释放缓冲区（mmap 打开的文件需要关闭）
+        """
+        for view in self._views:
+            view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+        return False
+
+    def __len__(self):
+        return self.count
+
+    def scope(self, folder_spec):
+        """
+        按文件夹限定条件计算搜索范围
+
+        路径以限定条件的完整若干级结尾的文件夹都会匹配（不区分大小写），
+        例如 Infra、Work/Infra 和 书签栏/Work/Infra 都能匹配 书签栏/Work/Infra。
+        第一次出现在范围之外、但在范围内重复出现的书签也会加入范围
+
+        参数:
+            folder_spec: 文件夹限定条件
+
+        返回:
+            范围列表（见 build_scope），没有匹配的文件夹时为空列表
+        """
+        spec = normalize_folder_spec(folder_spec)
+        if not spec:
+            return [(0, self.count, 1, self.folder_count)]
+        needle = f"/{spec}\0".encode('utf-8')
+        ranges = self._folder_ranges
+        scope = build_scope(
+            (folder_id, ranges[folder_id * 4], ranges[folder_id * 4 + 1], ranges[folder_id * 4 + 2])
+            for folder_id in self._folder_paths.find(needle, 0, self.folder_count)
+        )
+        # 范围内的文件夹编号为 [自身, folder_end)，重复出现位置按文件夹编号排序
+        duplicate_folders = self._duplicate_folders
+        duplicate_links = self._duplicate_links
+        return extend_scope(scope, [
+            duplicate_links[i]
+            for _, _, folder_start, folder_end in scope
+            for i in range(bisect_left(duplicate_folders, folder_start - 1),
+                           bisect_left(duplicate_folders, folder_end))
+        ])
+
+    def search(self, keyword, scope=None):
+        """
+        搜索标题或 URL 中包含关键词的书签（不区分大小写）
+
+        参数:
+            keyword: 搜索关键词，为空时返回范围内的全部书签
+            scope: 搜索范围（可选，见 scope()），默认为全部书签
+
+        返回:
+            按先序位置排列的书签编号数组 array('I')
+        """
+        if scope is None:
+            scope = [(0, self.count, 1, self.folder_count)]
+        matches = array('I')
+        needle = keyword.lower().encode('utf-8')
+        for link_start, link_end, _, _ in scope:
+            if not keyword:
+                matches.extend(range(link_start, link_end))
+            elif link_start < link_end:
+                matches.extend(self._link_search.find(needle, link_start, link_end))
+        return matches
+
+    def search_folders(self, keyword, scope=None):
+        """
+        搜索名称中包含关键词的文件夹（不区分大小写），限定范围时只搜索范围内的后代文件夹
+
+        参数:
+            keyword: 搜索关键词，为空时不返回文件夹
+            scope: 搜索范围（可选，见 scope()），默认为全部文件夹
+
+        返回:
+            按先序位置排列的文件夹编号数组 array('I')
+        """
+        if scope is None:
+            scope = [(0, self.count, 1, self.folder_count)]
+        matches = array('I')
+        if not keyword:
+            return matches
+        needle = keyword.lower().encode('utf-8')
+        for _, _, folder_start, folder_end in scope:
+            if folder_start < folder_end:
+                matches.extend(self._folder_names.find(needle, folder_start, folder_end))
+        return matches
+
+    def link(self, index):
+        """
+        读取一个书签
+
+        参数:
+            index: 书签编号
+
+        返回:
+            链接字典，包含 id, title, url, paths（所有出现位置的路径，第一个为第一次出现的位置）
+        """
+        bookmark_id, rest = self._link_records.get(index).decode('utf-8').split('\0', 1)
+        title, url = rest.rsplit('\0', 1)
+        paths = [self.folder(self._link_folders[index])['path']]
+        other_paths = self._link_paths.get(index)
+        if other_paths:
+            paths += other_paths.decode('utf-8').split('\0')
+        return {
+            'id': bookmark_id,
+            'title': title,
+            'url': url,
+            'paths': paths
+        }
+
+    def links(self, indices):
+        """
+        批量读取书签
+
+        参数:
+            indices: 书签编号序列
+
+        返回:
+            链接字典列表
+        """
+        return [self.link(index) for index in indices]
+
+    def folder(self, folder_id):
+        """
+        读取一个文件夹
+
+        参数:
+            folder_id: 文件夹编号
+
+        返回:
+            文件夹字典，包含 type（folder）, title, path, count（后代书签数，重复的书签按出现次数计）
+        """
+        title, path = self._folder_records.get(folder_id).decode('utf-8').split('\0', 1)
+        return {
+            'type': 'folder',
+            'title': title,
+            'path': path,
+            'count': self._folder_ranges[folder_id * 4 + 3]
+        }
+
+    def folders(self, folder_ids):
+        """
+        批量读取文件夹
+
+        参数:
+            folder_ids: 文件夹编号序列
+
+        返回:
+            文件夹字典列表
+        """
+        return [self.folder(folder_id) for folder_id in folder_ids]
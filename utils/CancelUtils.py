@@ -0,0 +1,113 @@
+import os
+import time
+
+from utils import LockUtils
+
+# 每个模块的代数标记目录（相对于 workflow 目录）
+GENERATION_DIR = os.path.join("cache", "generation")
+# 两次读取代数标记之间的最小间隔（秒），check() 可以放在循环中频繁调用
+CHECK_INTERVAL = 0.005
+
+_marker = None
+_token = None
+_next_check = 0.0
+_superseded = False
+_shield_depth = 0
+
+
+class Superseded(BaseException):
+    """
+    当前请求已被同一模块更新的请求取代
+
+    继承 BaseException 而不是 Exception，模块中 except Exception 的兜底处理不会吞掉它，
+    由 main.entrance 统一处理
+    """
+
+
+class _Shield:
+    """
+    取消保护区，配合 with 语句使用，区域内 check() 不会中断执行
+    """
+
+    def __enter__(self):
+        global _shield_depth
+        _shield_depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        global _shield_depth
+        _shield_depth -= 1
+        return False
+
+
+def begin(name):
+    """
+    开始一次请求：更新模块的代数标记，之前仍在运行的同模块请求会在下一个检查点退出
+
+    参数:
+        name: 模块路径，例如 tools.chrome_bookmark
+    """
+    global _marker
+    global _token
+    global _next_check
+    global _superseded
+    _token = f"{os.getpid()}:{time.time_ns()}".encode('ascii')
+    _superseded = False
+    _next_check = time.monotonic() + CHECK_INTERVAL
+    try:
+        os.makedirs(GENERATION_DIR, exist_ok=True)
+        marker = os.path.join(GENERATION_DIR, name)
+        LockUtils.atomic_write(marker, _token)
+        _marker = marker
+    except OSError:
+        # 标记写入失败时不启用取消
+        _marker = None
+
+
+def cancelled():
+    """
+    判断当前请求是否已被取代（按 CHECK_INTERVAL 节流读取标记，保护区内始终返回 False）
+
+    返回:
+        是否已被取代
+    """
+    global _next_check
+    global _superseded
+    if _marker is None or _shield_depth:
+        return False
+    if _superseded:
+        return True
+    now = time.monotonic()
+    if now < _next_check:
+        return False
+    _next_check = now + CHECK_INTERVAL
+    try:
+        with open(_marker, 'rb') as f:
+            _superseded = f.read() != _token
+    except OSError:
+        pass
+    return _superseded
+
+
+def check():
+    """
+    检查点：当前请求已被取代时抛出 Superseded
+
+    只应放在中断后不会留下不完整共享状态的位置
+    """
+    if cancelled():
+        raise Superseded(_marker)
+
+
+def shield():
+    """
+    进入取消保护区，用于共享缓存或索引的重建，避免重建到一半被取消
+
+    用法:
+        with CancelUtils.shield():
+            ...
+
+    返回:
+        上下文管理器
+    """
+    return _Shield()
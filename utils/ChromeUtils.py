@@ -0,0 +1,204 @@
+import os
+
+# macOS Chrome 默认用户配置目录（相对于 HOME）
+CHROME_PROFILE_DIR = "Library/Application Support/Google/Chrome/Default"
+FAVICONS_CACHE_DIR = os.path.join("logo", "favicons")  # 图标缓存目录
+CACHE_DIR = "cache"  # 本地缓存目录（数据库快照、索引等）
+
+
+def get_profile_file(name):
+    """
+    获取 Chrome 用户配置目录下的文件路径
+
+    参数:
+        name: 文件名，例如 Bookmarks / History / Favicons
+
+    返回:
+        文件路径，如果不存在返回 None
+    """
+    home = os.path.expanduser("~")
+    path = os.path.join(home, CHROME_PROFILE_DIR, name)
+    if os.path.exists(path):
+        return path
+    return None
+
+
+def get_database_mtime(source_db):
+    """
+    获取 sqlite 数据库的版本（数据库及其 WAL 文件的最新修改时间）
+
+    WAL 模式下新写入的数据先追加到 -wal 文件，只看主数据库文件的修改时间会漏掉这些变化
+
+    参数:
+        source_db: 数据库文件路径
+
+    返回:
+        修改时间（纳秒）
+    """
+    wal_file = source_db + "-wal"
+    return max(
+        os.stat(path).st_mtime_ns for path in (source_db, wal_file) if os.path.exists(path)
+    )
+
+
+def has_pending_wal(source_db):
+    """
+    判断 sqlite 数据库是否有尚未合并的 WAL 数据（-wal 文件存在且不为空）
+
+    以 immutable 方式打开时会忽略 WAL 文件，此时需要改为读取快照
+
+    参数:
+        source_db: 数据库文件路径
+
+    返回:
+        是否有未合并的 WAL 数据
+    """
+    try:
+        return os.path.getsize(source_db + "-wal") > 0
+    except OSError:
+        return False
+
+
+def snapshot_database(name):
+    """
+    获取 Chrome sqlite 数据库的本地快照
+
+    Chrome 运行时会锁定自己的数据库，需要复制后再读取。
+    快照在源数据库（或其 WAL 文件）变化后才会重建，多个进程同时发现过期时
+    只有一个进程重建，其余进程继续使用上一代快照
+
+    参数:
+        name: 数据库文件名，例如 Favicons / History
+
+    返回:
+        快照文件路径，如果不可用返回 None
+    """
+    from utils import LockUtils
+
+    source_db = get_profile_file(name)
+    if not source_db:
+        return None
+    wal_file = source_db + "-wal"
+
+    # 以数据库及其 WAL 文件的最新修改时间作为快照版本
+    source_mtime = get_database_mtime(source_db)
+
+    def is_fresh(snapshot):
+        return os.stat(snapshot).st_mtime_ns == source_mtime
+
+    def build(tmp):
+        import shutil
+        import sqlite3
+
+        # 复制主数据库文件，如果存在 WAL 文件也一起复制（可能包含未提交的数据）
+        shutil.copyfile(source_db, tmp)
+        if os.path.exists(wal_file):
+            shutil.copyfile(wal_file, tmp + "-wal")
+        try:
+            # 切换为 DELETE 日志模式，把 WAL 中的数据合并进快照，快照只需要一个文件
+            conn = sqlite3.connect(tmp)
+            conn.execute("PRAGMA journal_mode=DELETE")
+            conn.close()
+        finally:
+            for f in (tmp + "-wal", tmp + "-shm"):
+                if os.path.exists(f):
+                    os.remove(f)
+        os.utime(tmp, ns=(source_mtime, source_mtime))
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    snapshot = os.path.join(CACHE_DIR, f"{name.lower()}_snapshot.db")
+    status = LockUtils.single_flight(snapshot, is_fresh, build)
+    return snapshot if status != 'missing' else None
+
+
+def get_favicon(url):
+    """
+    获取网页的 favicon 图标
+
+    参数:
+        url: 网页 URL
+
+    返回:
+        图标字典 {"path": "图标路径"}，如果不存在返回 None
+    """
+    if not url:
+        return None
+
+    try:
+        # 只有需要展示图标时才导入
+        import hashlib
+
+        # 确保缓存目录存在
+        os.makedirs(FAVICONS_CACHE_DIR, exist_ok=True)
+
+        # 使用 URL 的哈希值作为文件名
+        url_hash = hashlib.md5(url.encode('utf-8')).hexdigest()
+        icon_path = os.path.join(FAVICONS_CACHE_DIR, f"{url_hash}.png")
+
+        # 如果缓存中已存在，直接返回（使用相对路径格式）
+        if os.path.exists(icon_path):
+            return {"path": f"./{icon_path}"}
+
+        # 尝试从 Chrome Favicons 数据库提取
+        icon_data = extract_local_icon(url)
+
+        if icon_data:
+            # 保存到缓存目录（原子写入，其他进程不会读到写了一半的图标）
+            from utils import LockUtils
+            LockUtils.atomic_write(icon_path, icon_data)
+            return {"path": f"./{icon_path}"}
+
+        return None
+    except Exception:
+        # 发生任何错误都返回 None，使用默认图标
+        return None
+
+
+def extract_local_icon(url):
+    """
+    从 Chrome Favicons 数据库提取图标
+
+    参数:
+        url: 网页 URL
+
+    返回:
+        图标二进制数据，如果不存在返回 None
+    """
+    try:
+        # 只有缓存未命中时才需要读取 Favicons 数据库
+        import sqlite3
+
+        snapshot = snapshot_database("Favicons")
+        if not snapshot:
+            return None
+
+        # 快照只会被整体替换，不会被修改，以不可变方式只读打开，无需加锁
+        conn = sqlite3.connect(f"file:{snapshot}?mode=ro&immutable=1", uri=True)
+        cursor = conn.cursor()
+
+        # 提取根域名，用于前缀匹配
+        domain = "/".join(url.split("/")[:3]) + "%"
+
+        # 查询图标数据
+        query = """
+        SELECT b.image_data
+        FROM favicon_bitmaps b
+        JOIN icon_mapping m ON m.icon_id = b.icon_id
+        WHERE m.page_url = ? OR m.page_url LIKE ?
+        ORDER BY b.width DESC LIMIT 1
+        """
+
+        try:
+            # 先试精确匹配，再试域名匹配
+            cursor.execute(query, (url, domain))
+            result = cursor.fetchone()
+            icon_data = result[0] if result else None
+        except sqlite3.Error:
+            icon_data = None
+        finally:
+            conn.close()
+
+        return icon_data
+    except Exception:
+        # 发生任何错误都返回 None
+        return None
@@ -0,0 +1,152 @@
+import fcntl
+import os
+import time
+
+
+class FileLock:
+    """
+    基于 flock 的跨进程文件锁
+
+    Alfred 在快速输入时会同时启动多个 main.py 进程，
+    需要保证耗时的重建操作同一时间只有一个进程在执行
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+
+    def acquire(self, timeout=None):
+        """
+        获取锁
+
+        参数:
+            timeout: 最长等待时间（秒，可选），None 表示一直等待，0 表示不等待
+
+        返回:
+            是否获取成功
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if timeout is None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            self.fd = fd
+            return True
+
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self.fd = fd
+                return True
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    return False
+                time.sleep(0.01)
+
+    def release(self):
+        """
+        释放锁
+        """
+        if self.fd is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.release()
+        return False
+
+
+def temp_path(path):
+    """
+    获取与目标文件同目录的临时文件路径（同一文件系统内 rename 才是原子的）
+
+    参数:
+        path: 目标文件路径
+
+    返回:
+        临时文件路径
+    """
+    return f"{path}.{os.getpid()}.tmp"
+
+
+def atomic_write(path, data):
+    """
+    原子写入文件：先写临时文件，再 rename 覆盖目标文件，
+    其他进程只会读到完整的旧文件或完整的新文件
+
+    参数:
+        path: 目标文件路径
+        data: 文件内容（bytes）
+    """
+    tmp = temp_path(path)
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def single_flight(path, is_fresh, build, wait=2.0, is_usable=None):
+    """
+    单飞重建：多个进程同时发现产物过期时，只有一个进程执行重建
+
+    重建进程将新产物写入临时文件后 rename 覆盖目标文件；
+    其他进程如果有可用的上一代产物则直接使用，没有则等待重建完成（最多 wait 秒）。
+    重建在取消保护区内执行，当前请求被取代时也会完成重建，避免其他进程等待的产物半途而废
+
+    参数:
+        path: 产物文件路径，锁文件为 path + '.lock'
+        is_fresh: 判断产物是否为最新的函数，参数为产物路径
+        build: 重建函数，参数为临时文件路径，需要把新产物完整写入该路径
+        wait: 没有上一代产物时最长等待时间（秒，可选）
+        is_usable: 判断上一代产物是否仍可使用的函数（可选），参数为产物路径，例如检查文件格式版本；
+                   默认只要存在即可使用
+
+    返回:
+        fresh: 产物已是最新 | built: 当前进程完成了重建 |
+        stale: 其他进程正在重建，使用上一代产物 | missing: 没有可用产物
+    """
+    from utils import CancelUtils
+
+    if os.path.exists(path) and is_fresh(path):
+        return 'fresh'
+
+    lock = FileLock(path + '.lock')
+    if lock.acquire(timeout=0):
+        try:
+            # 获取锁之前其他进程可能已经完成了重建
+            if os.path.exists(path) and is_fresh(path):
+                return 'fresh'
+            tmp = temp_path(path)
+            try:
+                with CancelUtils.shield():
+                    build(tmp)
+                    os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            return 'built'
+        finally:
+            lock.release()
+
+    def usable():
+        return os.path.exists(path) and (is_usable is None or is_usable(path))
+
+    # 其他进程正在重建
+    if usable():
+        return 'stale'
+    if lock.acquire(timeout=wait):
+        lock.release()
+        if usable():
+            return 'fresh'
+    return 'missing'
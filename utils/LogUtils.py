@@ -1,19 +1,19 @@
 #!/usr/bin/python
 # encoding: utf-8
 
-import logging
-import traceback
-import logging.handlers
 import os
+import time
 
-logger = None
-LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+log_file_path = None
+LOG_FORMAT = "{asctime} - {levelname} - {message}"
+# 日志文件最大体积，超过后轮转为 .1 备份
+MAX_BYTES = 10 * 1024 * 1024
 
 
 def _get_log_file_path():
     """
     获取日志文件路径（相对于项目根目录）
-    
+
     返回:
         日志文件的绝对路径
     """
@@ -25,46 +25,63 @@ def _get_log_file_path():
     return os.path.join(project_root, 'alfred.log')
 
 class LogUtils:
+    """
+    日志工具
+
+    每次 Alfred 调用都是一个新进程，日志直接追加写入文件，
+    不引入 logging / traceback 等模块，避免拖慢启动速度
+    """
     def init():
         """
-        初始化日志记录器
+        初始化日志文件路径，日志文件超过 10MB 时轮转为 .1 备份
         """
-        global logger
-        logger = logging.getLogger('alfred')
-        logger.setLevel(logging.DEBUG)
-        
+        global log_file_path
         log_file_path = _get_log_file_path()
-        rotating_file_handler = logging.handlers.RotatingFileHandler(
-            log_file_path,
-            maxBytes=10 * 1024 * 1024,  # 10MB
-            backupCount=1,
-            encoding='utf-8'
-        )
-        rotating_file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
-        logger.handlers.clear()
-        logger.addHandler(rotating_file_handler)
+        try:
+            if os.path.exists(log_file_path) and os.path.getsize(log_file_path) > MAX_BYTES:
+                os.replace(log_file_path, log_file_path + '.1')
+        except OSError:
+            pass
+
+    def write(levelname, msg):
+        """
+        按 LOG_FORMAT 格式追加写入一条日志
+
+        参数:
+            levelname: 日志级别，例如 INFO / ERROR
+            msg: 日志消息
+        """
+        if log_file_path is None:
+            LogUtils.init()
+        now = time.time()
+        asctime = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now))
+        asctime = "{},{:03d}".format(asctime, int(now * 1000) % 1000)
+        line = LOG_FORMAT.format(asctime=asctime, levelname=levelname, message=msg)
+        try:
+            with open(log_file_path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+        except OSError:
+            pass
 
     def error(msg, extra={}):
         """
         记录错误日志
-        
+
         参数:
             msg: 错误消息
             extra: 额外信息（可选）
         """
+        # 只有出错时才需要 traceback，按需导入
+        import traceback
         s = traceback.format_exc()
-        if logger is None:
-            LogUtils.init()
-        logger.error("{} : {}".format(msg, s), extra=extra)
+        LogUtils.write('ERROR', "{} : {}".format(msg, s))
 
     def info(msg, extra={}):
         """
         记录信息日志
-        
+
         参数:
             msg: 信息消息
             extra: 额外信息（可选）
         """
-        if logger is None:
-            LogUtils.init()
-        logger.info(msg, exc_info=True)
\ No newline at end of file
+        LogUtils.write('INFO', msg)
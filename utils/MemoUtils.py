@@ -0,0 +1,190 @@
+import marshal
+import os
+import time
+import zlib
+
+from utils import LockUtils
+
+# 持久化结果缓存目录（相对于 workflow 目录）
+MEMO_DIR = os.path.join("cache", "memo")
+# 每个命名空间最多保留的条目数，超出时删除最旧的条目
+MAX_ENTRIES = 256
+# 条目最长保留时间（秒），超过后无论是否有效都会被清理
+MAX_AGE = 7 * 24 * 3600
+# 同一命名空间两次清理之间的最小间隔（秒）
+SWEEP_INTERVAL = 300
+
+
+def fingerprint(files):
+    """
+    计算源文件指纹，任一文件的修改时间或大小变化都会导致指纹变化
+
+    参数:
+        files: 文件路径列表
+
+    返回:
+        指纹元组，不存在的文件记为 (路径, None, None)
+    """
+    result = []
+    for path in files:
+        try:
+            stat = os.stat(path)
+            result.append((path, stat.st_mtime_ns, stat.st_size))
+        except (OSError, TypeError):
+            result.append((path, None, None))
+    return tuple(result)
+
+
+def _entry_path(namespace, key):
+    """
+    获取缓存条目的文件路径
+
+    参数:
+        namespace: 命名空间，通常为模块名
+        key: 缓存键（需要可 repr）
+
+    返回:
+        缓存文件路径
+    """
+    # 使用 crc32 而不是 hashlib，避免在每次请求时加载 OpenSSL；
+    # 发生碰撞时条目中保存的 key 不一致，按未命中处理
+    data = repr(key).encode('utf-8')
+    digest = f"{zlib.crc32(data):08x}{len(data):x}"
+    return os.path.join(MEMO_DIR, namespace, f"{digest}.marshal")
+
+
+def _remove(path):
+    """
+    删除缓存文件，文件已被其他进程删除时忽略
+
+    参数:
+        path: 缓存文件路径
+    """
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def load(namespace, key, files=(), ttl=None):
+    """
+    读取缓存，过期、源文件已变化或无法读取的条目会被删除
+
+    参数:
+        namespace: 命名空间，通常为模块名
+        key: 缓存键
+        files: 源文件列表（可选），文件变化后缓存失效
+        ttl: 有效期（秒，可选），None 表示不过期
+
+    返回:
+        (是否命中, 缓存值)
+    """
+    path = _entry_path(namespace, key)
+    try:
+        with open(path, 'rb') as f:
+            entry = marshal.load(f)
+    except FileNotFoundError:
+        return False, None
+    except Exception:
+        _remove(path)
+        return False, None
+
+    if not isinstance(entry, dict):
+        _remove(path)
+        return False, None
+    # crc32 碰撞时条目属于另一个键，保留
+    if entry.get('key') != key:
+        return False, None
+    if ttl is not None and time.time() - entry.get('created', 0) > ttl:
+        _remove(path)
+        return False, None
+    if entry.get('fingerprint') != fingerprint(files):
+        _remove(path)
+        return False, None
+    return True, entry.get('value')
+
+
+def save(namespace, key, value, files=()):
+    """
+    写入缓存（原子写入，并发进程不会读到写了一半的条目），并按 SWEEP_INTERVAL 清理命名空间中的旧条目
+
+    参数:
+        namespace: 命名空间，通常为模块名
+        key: 缓存键
+        value: 缓存值（只支持 dict / list / tuple / str / int / float 等内置类型）
+        files: 源文件列表（可选），用于计算指纹
+    """
+    path = _entry_path(namespace, key)
+    entry = {
+        'key': key,
+        'created': time.time(),
+        'fingerprint': fingerprint(files),
+        'value': value
+    }
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 使用 marshal 而不是 pickle：内置模块无需额外导入，读写也更快
+        LockUtils.atomic_write(path, marshal.dumps(entry))
+        _maybe_sweep(namespace)
+    except Exception:
+        # 缓存写入失败不影响本次结果
+        pass
+
+
+def _maybe_sweep(namespace):
+    """
+    距上次清理超过 SWEEP_INTERVAL 时清理命名空间，同一时间只有一个进程清理
+
+    以锁文件的修改时间记录上次清理的时间
+
+    参数:
+        namespace: 命名空间
+    """
+    lock_path = os.path.join(MEMO_DIR, f"{namespace}.lock")
+    try:
+        if time.time() - os.stat(lock_path).st_mtime < SWEEP_INTERVAL:
+            return
+    except FileNotFoundError:
+        pass
+
+    lock = LockUtils.FileLock(lock_path)
+    if not lock.acquire(timeout=0):
+        return
+    try:
+        sweep(namespace)
+        os.utime(lock_path)
+    finally:
+        lock.release()
+
+
+def sweep(namespace, max_entries=MAX_ENTRIES, max_age=MAX_AGE):
+    """
+    清理命名空间: 删除超过 max_age 的条目（包括异常退出遗留的临时文件），
+    条目数仍超过 max_entries 时删除最旧的条目
+
+    参数:
+        namespace: 命名空间
+        max_entries: 最多保留的条目数（可选）
+        max_age: 条目最长保留时间（秒，可选）
+    """
+    directory = os.path.join(MEMO_DIR, namespace)
+    now = time.time()
+    entries = []
+    try:
+        with os.scandir(directory) as it:
+            for item in it:
+                try:
+                    mtime = item.stat().st_mtime
+                except OSError:
+                    continue
+                if now - mtime > max_age:
+                    _remove(item.path)
+                elif item.name.endswith(".marshal"):
+                    entries.append((mtime, item.path))
+    except FileNotFoundError:
+        return
+
+    if len(entries) > max_entries:
+        entries.sort()
+        for _, path in entries[:len(entries) - max_entries]:
+            _remove(path)
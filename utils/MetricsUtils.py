@@ -0,0 +1,144 @@
+import json
+import os
+import time
+
+# 指标文件最大体积，超过后轮转为 .1 备份（与日志文件保持一致）
+MAX_BYTES = 10 * 1024 * 1024
+METRICS_FILE_NAME = 'alfred_metrics.jsonl'
+
+_record = None
+_start = None
+
+
+def _get_metrics_file_path():
+    """
+    获取指标文件路径（相对于项目根目录）
+
+    返回:
+        指标文件的绝对路径
+    """
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(current_dir)
+    return os.path.join(project_root, METRICS_FILE_NAME)
+
+
+class _Phase:
+    """
+    阶段计时器，配合 with 语句使用，耗时（毫秒）累加到当前请求记录中
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.begin = None
+
+    def __enter__(self):
+        self.begin = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if _record is not None:
+            elapsed = (time.perf_counter() - self.begin) * 1000
+            phases = _record['phases']
+            phases[self.name] = round(phases.get(self.name, 0) + elapsed, 3)
+        return False
+
+
+def begin(module_name, args):
+    """
+    开始记录一次请求
+
+    参数:
+        module_name: 模块路径，例如 tools.time
+        args: 搜索参数列表
+    """
+    global _record
+    global _start
+    _start = time.perf_counter()
+    _record = {
+        'ts': round(time.time(), 3),
+        'module': module_name,
+        'arg_len': len(' '.join(args)),
+        'phases': {},
+        'results': 0,
+        'cache': None,
+        'status': 'ok'
+    }
+
+
+def phase(name):
+    """
+    记录一个阶段的耗时
+
+    用法:
+        with MetricsUtils.phase('getData'):
+            ...
+
+    参数:
+        name: 阶段名称
+    """
+    return _Phase(name)
+
+
+def mark(key, value):
+    """
+    设置当前请求记录中的字段，例如 mark('cache', 'hit')
+
+    参数:
+        key: 字段名
+        value: 字段值
+    """
+    if _record is not None:
+        _record[key] = value
+
+
+def finish(status=None, results=None):
+    """
+    结束当前请求，并将记录追加写入指标文件（每行一个 JSON）
+
+    参数:
+        status: 退出状态（可选），ok | no_data | error
+        results: 返回给 Alfred 的结果条数（可选）
+    """
+    global _record
+    if _record is None:
+        return
+    record = _record
+    _record = None
+    if status is not None:
+        record['status'] = status
+    if results is not None:
+        record['results'] = results
+    record['total'] = round((time.perf_counter() - _start) * 1000, 3)
+
+    path = _get_metrics_file_path()
+    try:
+        if os.path.exists(path) and os.path.getsize(path) > MAX_BYTES:
+            os.replace(path, path + '.1')
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        # 单行追加写入，多个进程并发追加时不会互相截断
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+    except OSError:
+        pass
+
+
+def iter_records(path=None):
+    """
+    逐行读取指标文件，不会一次性加载整个文件
+
+    参数:
+        path: 指标文件路径（可选，默认项目根目录下的指标文件）
+
+    返回:
+        记录字典的生成器，无法解析的行会被跳过
+    """
+    path = path or _get_metrics_file_path()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
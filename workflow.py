@@ -10,7 +10,7 @@ https://www.alfredapp.com/help/workflows/inputs/script-filter/json/
 class ChangXianWorkFlow:
     items = [];
     
-    def add_item(self, title, subtitle='', valid=True, icon=None, arg=None):
+    def add_item(self, title, subtitle='', valid=True, icon=None, arg=None, variables=None, autocomplete=None):
         """
         添加一个结果项
         
@@ -20,13 +20,17 @@ class ChangXianWorkFlow:
             valid: 条目是否有效，是否可操作（可选，默认True）
             icon: 条目图标（可选）
             arg: 传递给下一个操作的参数（可选）
+            variables: 选中该条目时设置的 Alfred 变量（可选）
+            autocomplete: 按 Tab（或回车选中无效条目）时补全到输入框的文本（可选）
         """
         item = {
             'title': title,
             'subtitle': subtitle,
             'valid': valid,
             'icon': icon,
-            'arg': arg
+            'arg': arg,
+            'variables': variables,
+            'autocomplete': autocomplete
         }
         # 移除 None 值的字段，保持 JSON 简洁
         item = {k: v for k, v in item.items() if v is not None}